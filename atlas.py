@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按鍵圖片 atlas - 把所有來源圖片合併成一張圖片，附 JSON 索引
+
+啟動時只需讀取一張 atlas 圖片，再依索引切出各按鍵的原圖，
+不必逐一開啟、解碼約 110 個小檔案。
+索引記錄每張來源的修改時間、大小與內容雜湊；來源有變動時只重新讀取變動的檔案，
+尺寸不變時直接貼回原位置，否則重新排列。更新在工作執行緒進行，
+完成前 crop 只切出修改時間與大小仍相符的圖片，其餘由呼叫端直接讀取原檔。
+
+單獨執行時依 config.json 與 key_map.json 建立 atlas：
+    python atlas.py [--output cache]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import math
+import os
+import threading
+
+from PIL import Image
+
+ATLAS_IMAGE = "atlas.png"
+ATLAS_INDEX = "atlas.json"
+INDEX_VERSION = 1
+
+
+def pack_shelves(sizes):
+    """以「層架」方式排列矩形，回傳 (atlas 寬, atlas 高, [(x, y), ...])"""
+    if not sizes:
+        return 1, 1, []
+    area = sum(w * h for w, h in sizes)
+    width = max(max(w for w, _ in sizes), math.ceil(math.sqrt(area)))
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    # 由高到矮排列，同一層的高度較接近，浪費的空間較少
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i][1]):
+        w, h = sizes[i]
+        if x + w > width:
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+        positions[i] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return width, y + shelf_height, positions
+
+
+class TextureAtlas:
+    """來源圖片的 atlas（crop 與 sync 都可在任何執行緒呼叫，sync 不會卡住 crop）"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.image_path = os.path.join(directory, ATLAS_IMAGE)
+        self.index_path = os.path.join(directory, ATLAS_INDEX)
+        self.entries = {}   # {來源路徑: {"mtime_ns", "size", "digest", "box": [x, y, w, h]}}
+        self._image = None  # atlas 圖片，第一次需要像素時才解碼
+        self._lock = threading.Lock()       # 保護 entries 與 _image（只在讀取或替換時持有）
+        self._sync_lock = threading.Lock()  # 同一時間只有一個 sync
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION and os.path.exists(self.image_path):
+                self.entries = index["entries"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"讀取 atlas 索引失敗: {e}，重新建立")
+
+    def _atlas_image(self):
+        """取得 atlas 圖片（需持有鎖）"""
+        if self._image is None:
+            try:
+                with Image.open(self.image_path) as img:
+                    self._image = img.convert("RGBA")
+            except (FileNotFoundError, OSError):
+                self.entries = {}
+                self._image = Image.new("RGBA", (1, 1))
+        return self._image
+
+    def crop(self, path, mtime_ns=None, size=None):
+        """切出來源圖片的原圖；不在 atlas 中或與指定的修改時間、大小不符時回傳 None"""
+        with self._lock:
+            atlas = self._atlas_image()
+            entry = self.entries.get(path)
+            if entry is None:
+                return None
+            if mtime_ns is not None and (entry["mtime_ns"], entry["size"]) != (mtime_ns, size):
+                return None
+            x, y, w, h = entry["box"]
+            return atlas.crop((x, y, x + w, y + h))
+
+    def sync(self, paths):
+        """讓 atlas 與來源檔案一致，只讀取有變動的檔案；回傳有變動的來源路徑"""
+        with self._sync_lock:
+            return self._sync(set(paths))
+
+    def _sync(self, paths):
+        changed = {}  # {來源路徑: (索引資料, 圖片)}
+        with self._lock:
+            old_entries = dict(self.entries)
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entry = old_entries.get(path)
+            if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                with Image.open(io.BytesIO(data)) as img:
+                    img = img.convert("RGBA")
+            except Exception as e:
+                print(f"無法加入 atlas {path}: {e}")
+                continue
+            changed[path] = ({"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                              "digest": hashlib.sha1(data).hexdigest()}, img)
+
+        removed = old_entries.keys() - paths
+        if not changed and not removed:
+            return set()
+
+        with self._lock:
+            atlas = self._atlas_image()
+            intact = bool(self.entries) or not old_entries
+        if not intact:
+            return self._sync(paths)  # atlas 圖片損毀，全部重新讀取
+
+        # 在副本上修改，crop 在此期間仍使用舊的 atlas
+        entries = {path: dict(entry) for path, entry in old_entries.items() if path in paths}
+        repack = False
+        for path, (entry, img) in changed.items():
+            old = entries.get(path)
+            if old is not None and tuple(old["box"][2:]) == img.size:
+                entry["box"] = old["box"]
+            else:
+                repack = True
+            entries[path] = entry
+        if repack:
+            atlas = self._repack(atlas, entries, changed)
+        else:
+            # 尺寸不變的圖片直接貼回原位置
+            atlas = atlas.copy()
+            for path, (entry, img) in changed.items():
+                atlas.paste(img, tuple(entry["box"][:2]))
+        with self._lock:
+            self._image, self.entries = atlas, entries
+        self._save(atlas, entries)
+        return set(changed) | removed
+
+    def _repack(self, atlas, entries, changed):
+        """重新排列所有圖片（未變動的從舊 atlas 切出）"""
+        images = []
+        for path, entry in entries.items():
+            if path in changed:
+                images.append(changed[path][1])
+            else:
+                x, y, w, h = entry["box"]
+                images.append(atlas.crop((x, y, x + w, y + h)))
+        width, height, positions = pack_shelves([img.size for img in images])
+        packed = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        for (path, entry), img, (x, y) in zip(entries.items(), images, positions):
+            packed.paste(img, (x, y))
+            entry["box"] = [x, y, img.width, img.height]
+        return packed
+
+    def _save(self, atlas, entries):
+        """寫入 atlas 圖片與索引（先寫暫存檔再改名）"""
+        try:
+            atlas.save(self.image_path + ".tmp", "PNG", compress_level=1)
+            os.replace(self.image_path + ".tmp", self.image_path)
+            with open(self.index_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "entries": entries}, f, ensure_ascii=False)
+            os.replace(self.index_path + ".tmp", self.index_path)
+        except Exception as e:
+            print(f"寫入 atlas 失敗: {e}")
+
+
+def main():
+    """依設定檔建立或更新 atlas"""
+    from keymap import KeyMap
+    from image_paths import ImagePathResolver
+    from resources import DEFAULT_CONFIG
+
+    parser = argparse.ArgumentParser(description='按鍵圖片 atlas 產生器')
+    parser.add_argument('--output', '-o', default=None,
+                        help='輸出目錄（預設為 config.json 的 thumbnail_cache_dir）')
+    args = parser.parse_args()
+
+    config = {}
+    if os.path.exists("config.json"):
+        with open("config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+    image_paths = ImagePathResolver(config.get("user_dir", DEFAULT_CONFIG["user_dir"]),
+                                    config.get("default_dir", DEFAULT_CONFIG["default_dir"]))
+    output = args.output or config.get("thumbnail_cache_dir", DEFAULT_CONFIG["thumbnail_cache_dir"])
+
+    key_map = KeyMap.load("key_map.json", default=None)
+    paths = [path for path in map(image_paths.resolve, key_map.pngs()) if path]
+    atlas = TextureAtlas(output)
+    changed = atlas.sync(paths)
+    print(f"atlas 共 {len(atlas.entries)} 張圖片，更新 {len(changed)} 張: {atlas.image_path}")
+
+
+if __name__ == "__main__":
+    main()
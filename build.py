@@ -113,7 +113,7 @@ def create_readme():
 1. 程式會自動偵測鍵盤按鍵
 2. 在 user 資料夾中放入自訂按鍵圖片
 3. 圖片名稱必須與按鍵列表中的名稱相符
-4. 放入新圖片後需要重啟程式
+4. 放入或修改圖片後會自動重新載入
 5. 圖片最小建議為 60px * 60px
 
 檔案結構：
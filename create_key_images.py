@@ -6,9 +6,9 @@
 """
 
 from PIL import Image, ImageDraw, ImageFont
-import json
 import os
 import argparse
+from keymap import KeyMap
 
 class KeyImageGenerator:
     def __init__(self, output_dir="generated_keys"):
@@ -141,14 +141,13 @@ class KeyImageGenerator:
     def create_from_key_map(self, key_map_file="key_map.json"):
         """根據 key_map.json 創建所有按鍵圖片"""
         try:
-            with open(key_map_file, 'r', encoding='utf-8') as f:
-                key_map = json.load(f)
+            key_map = KeyMap.load(key_map_file)
             
             print(f"從 {key_map_file} 載入 {len(key_map)} 個按鍵")
             
-            for keycode, key_info in key_map.items():
-                key_name = key_info.get("name", f"Key{keycode}")
-                image_filename = key_info.get("png", f"{key_name}.png")
+            # 多個按鍵共用同一張圖片時只產生一次
+            for image_filename in key_map.pngs():
+                key_name = key_map.by_png(image_filename)[0].name
                 
                 # 創建按鍵圖片
                 self.create_key_image(key_name, image_filename)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+圖片目錄監看 - 偵測 user / default 資料夾中的 .png 新增、修改與刪除
+
+- Linux：使用 inotify，由 Tk 事件迴圈直接監看檔案描述子，閒置時不會喚醒
+- 其他平台：每隔一段時間對每個目錄做一次 os.scandir 並比對快照
+
+連續寫入會合併（debounce），停止變動一段時間後才以
+callback({(目錄, 檔名), ...}) 通知一次，callback 一律在 Tk 執行緒執行。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import tkinter as tk
+
+# inotify 事件旗標（linux/inotify.h）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class _InotifyBackend:
+    """以 inotify 監看目錄，檔案描述子交給 Tk 的 createfilehandler"""
+
+    def __init__(self, watcher, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失敗")
+        self.watcher = watcher
+        self.watches = {}  # {wd: 目錄}
+        for directory in directories:
+            if not os.path.isdir(directory):
+                print(f"圖片目錄不存在，無法監看: {directory}")
+                continue
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                print(f"無法監看目錄 {directory}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self.watches[wd] = directory
+        watcher.widget.tk.createfilehandler(self.fd, tk.READABLE, self._on_readable)
+
+    def _on_readable(self, fd, mask):
+        """讀出所有事件並交給 watcher"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, _, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            directory = self.watches.get(wd)
+            if directory is not None and name:
+                self.watcher.notify(directory, os.fsdecode(name))
+
+    def close(self):
+        self.watcher.widget.tk.deletefilehandler(self.fd)
+        os.close(self.fd)
+
+
+class _ScandirBackend:
+    """定時對每個目錄做一次 os.scandir，與上次的 (mtime, 大小) 快照比對"""
+
+    def __init__(self, watcher, directories, interval):
+        self.watcher = watcher
+        self.directories = list(directories)
+        self.interval = interval
+        self.snapshots = {directory: self._scan(directory) for directory in self.directories}
+        self._after_id = watcher.widget.after(self.interval, self._poll)
+
+    @staticmethod
+    def _scan(directory):
+        try:
+            with os.scandir(directory) as entries:
+                return {entry.name: (entry.stat().st_mtime_ns, entry.stat().st_size)
+                        for entry in entries if entry.is_file()}
+        except FileNotFoundError:
+            return {}
+
+    def _poll(self):
+        for directory in self.directories:
+            old = self.snapshots[directory]
+            new = self._scan(directory)
+            if new != old:
+                for name in old.keys() | new.keys():
+                    if old.get(name) != new.get(name):
+                        self.watcher.notify(directory, name)
+                self.snapshots[directory] = new
+        self._after_id = self.watcher.widget.after(self.interval, self._poll)
+
+    def close(self):
+        self.watcher.widget.after_cancel(self._after_id)
+
+
+class DirectoryWatcher:
+    """監看多個目錄中的 .png 變更，debounce 後一次回呼"""
+
+    def __init__(self, widget, directories, callback, debounce_ms=300, poll_interval_ms=1000,
+                 suffix=".png"):
+        self.widget = widget
+        self.callback = callback
+        self.debounce_ms = debounce_ms
+        self.suffix = suffix
+        self._changes = set()
+        self._after_id = None
+        self.backend = None
+        if sys.platform.startswith("linux"):
+            try:
+                self.backend = _InotifyBackend(self, directories)
+                print("使用 inotify 監看圖片目錄")
+            except Exception as e:
+                print(f"無法使用 inotify: {e}，改用定時掃描")
+        if self.backend is None:
+            self.backend = _ScandirBackend(self, directories, poll_interval_ms)
+
+    def notify(self, directory, name):
+        """記錄一個變更，並重新計算 debounce 時間"""
+        if not name.lower().endswith(self.suffix):
+            return
+        self._changes.add((directory, name))
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+        self._after_id = self.widget.after(self.debounce_ms, self._flush)
+
+    def _flush(self):
+        self._after_id = None
+        changes, self._changes = self._changes, set()
+        if changes:
+            self.callback(changes)
+
+    def close(self):
+        """停止監看"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self.backend.close()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+背景圖片載入 - 在執行緒池解碼與縮放圖片，結果交回 Tk 執行緒
+
+PIL 解碼與縮放時會釋放 GIL，所以多個執行緒可以同時處理；
+Tk 物件只能在主執行緒建立，完成的結果放入佇列，由 root.after 分批取出
+（PhotoImage 由呼叫端在 callback 中建立，例如 ImageStore）。
+同一張原圖的各種尺寸都由同一個 MipChain 產生，原圖只解碼一次。
+"""
+
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from mipmap import MipChain
+
+
+def open_image(path):
+    """讀取原圖，回傳 PIL 圖片（可在任何執行緒呼叫）"""
+    with Image.open(path) as img:
+        img.load()
+        return img
+
+
+class ImageLoader:
+    """在背景執行解碼等工作，完成後於 Tk 執行緒呼叫 callback(結果)"""
+
+    def __init__(self, widget, max_workers=None, batch_size=8, interval=10, thumbnail_cache=None,
+                 atlas=None, max_chain_bytes=32 * 1024 * 1024):
+        self.widget = widget
+        self.thumbnail_cache = thumbnail_cache  # 有設定時先從磁碟快取讀取縮圖
+        self.atlas = atlas                      # 有設定時從 atlas 切出原圖，不開啟個別檔案
+        self.batch_size = batch_size  # 每次最多包裝幾張，避免卡住畫面
+        self.interval = interval      # 取出結果的間隔（毫秒）
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1),
+                                        thread_name_prefix="image_loader")
+        self._done = deque()          # 工作執行緒完成的結果
+        self._outstanding = 0         # 尚未交給 callback 的工作數
+        self._after_id = None
+        self.max_chain_bytes = max_chain_bytes  # 保留在記憶體中的 MipChain 上限
+        self._chains = OrderedDict()  # {(path, mtime_ns, size): MipChain}，最近使用的在最後
+        self._chain_sizes = {}        # {(path, mtime_ns, size): 已計入的位元組數}
+        self._chain_bytes = 0         # 所有 MipChain 的位元組數（產生新的一層時累加，不必鎖住各個 chain）
+        self._chains_lock = threading.Lock()
+
+    def load(self, path, size, resample=Image.Resampling.LANCZOS):
+        """產生一張指定尺寸的 PIL 圖片（工作執行緒），有縮圖快取時先從快取讀取"""
+        if self.thumbnail_cache is not None:
+            return self.thumbnail_cache.load(path, size, resample, self._decode)
+        return self._decode(path, size, resample)
+
+    def run(self, func, args, callback, on_error=None):
+        """在執行緒池執行 func(*args)（例如更新 atlas），完成後於 Tk 執行緒呼叫 callback(結果)"""
+        future = self._pool.submit(func, *args)
+        self._enqueue(future, getattr(func, "__name__", func), callback, on_error)
+
+    def _enqueue(self, future, path, callback, on_error):
+        self._outstanding += 1
+        future.add_done_callback(lambda f: self._done.append((f, path, callback, on_error)))
+        self._schedule()
+
+    def _open_source(self, path, st):
+        """讀取原圖（工作執行緒），atlas 中有且與檔案一致的圖片直接切出"""
+        img = self.atlas.crop(path, st.st_mtime_ns, st.st_size) if self.atlas is not None else None
+        return img if img is not None else open_image(path)
+
+    def mip_chain(self, path):
+        """取得原圖的 MipChain；檔案內容改變（修改時間或大小不同）時使用新的一組"""
+        st = os.stat(path)
+        chain_key = (path, st.st_mtime_ns, st.st_size)
+        with self._chains_lock:
+            chain = self._chains.get(chain_key)
+            if chain is None:
+                chain = self._chains[chain_key] = MipChain(
+                    lambda: self._open_source(path, st), on_level=lambda nbytes: self._count_level(chain_key, nbytes))
+                self._chain_sizes[chain_key] = 0
+            self._chains.move_to_end(chain_key)
+        return chain
+
+    def _count_level(self, chain_key, nbytes):
+        """MipChain 產生新的一層後累加位元組數，超過上限時捨棄最久沒用到的 chain"""
+        with self._chains_lock:
+            if chain_key not in self._chain_sizes:
+                return  # 已被捨棄
+            self._chain_sizes[chain_key] += nbytes
+            self._chain_bytes += nbytes
+            # 正在使用的 chain 由呼叫端持有，被捨棄也不受影響
+            while self._chain_bytes > self.max_chain_bytes and len(self._chains) > 1:
+                oldest, _ = self._chains.popitem(last=False)
+                self._chain_bytes -= self._chain_sizes.pop(oldest)
+
+    def _decode(self, path, size, resample):
+        """產生一張指定尺寸的圖片（工作執行緒）"""
+        return self.mip_chain(path).resize(size, resample)
+
+    def _schedule(self):
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.interval, self._drain)
+
+    def _drain(self):
+        """在 Tk 執行緒把完成的結果交給 callback"""
+        self._after_id = None
+        for _ in range(min(self.batch_size, len(self._done))):
+            future, path, callback, on_error = self._done.popleft()
+            self._outstanding -= 1
+            try:
+                result = future.result()
+            except Exception as e:
+                try:
+                    if on_error:
+                        on_error(e)
+                    else:
+                        print(f"載入圖片 {path} 失敗: {e}")
+                except Exception as callback_error:
+                    print(f"處理載入失敗 {path} 時發生錯誤: {callback_error}")
+                continue
+            try:
+                callback(result)
+            except Exception as e:
+                # 單一 callback 失敗不影響之後的結果，也不會停止排程
+                print(f"處理載入結果 {path} 失敗: {e}")
+        # 還有工作沒完成才繼續排程，全部完成後不再喚醒
+        if self._outstanding:
+            self._schedule()
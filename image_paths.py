@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+圖片路徑解析 - 決定每張圖片使用 user 還是 default 資料夾的版本
+
+啟動時對兩個資料夾各做一次 os.scandir，之後查詢只查表；
+資料夾內容變更時由目錄監看呼叫 update()，只重新檢查有變動的檔名。
+"""
+
+import os
+
+
+class ImagePathResolver:
+    """使用者圖片優先、找不到時使用預設圖片的路徑解析"""
+
+    def __init__(self, user_dir, default_dir):
+        self.user_dir = user_dir
+        self.default_dir = default_dir
+        self._files = {}     # {目錄: {normcase(檔名)}}
+        self._resolved = {}  # {png: (路徑, 是否為使用者圖片)}，None 表示找不到
+        self.refresh()
+
+    @staticmethod
+    def _scan(directory):
+        try:
+            with os.scandir(directory) as entries:
+                return {os.path.normcase(entry.name) for entry in entries if entry.is_file()}
+        except FileNotFoundError:
+            return set()
+
+    def refresh(self):
+        """重新掃描兩個資料夾"""
+        self._files = {self.user_dir: self._scan(self.user_dir),
+                       self.default_dir: self._scan(self.default_dir)}
+        self._resolved.clear()
+
+    def update(self, changes):
+        """依目錄監看的變更 {(目錄, 檔名)} 更新，只重新檢查這些檔案"""
+        for directory, name in changes:
+            files = self._files.get(directory)
+            if files is None:
+                continue
+            if os.path.isfile(os.path.join(directory, name)):
+                files.add(os.path.normcase(name))
+            else:
+                files.discard(os.path.normcase(name))
+        for _, name in changes:
+            for png in [png for png in self._resolved if os.path.normcase(png) == os.path.normcase(name)]:
+                del self._resolved[png]
+
+    def _lookup(self, png):
+        resolved = self._resolved.get(png, False)
+        if resolved is False:
+            name = os.path.normcase(png)
+            if name in self._files[self.user_dir]:
+                resolved = (os.path.join(self.user_dir, png), True)
+            elif name in self._files[self.default_dir]:
+                resolved = (os.path.join(self.default_dir, png), False)
+            else:
+                resolved = None
+            self._resolved[png] = resolved
+        return resolved
+
+    def resolve(self, png):
+        """圖片的實際路徑，兩個資料夾都沒有時回傳 None"""
+        resolved = self._lookup(png)
+        return resolved[0] if resolved else None
+
+    def is_user_image(self, png):
+        """圖片是否來自使用者資料夾"""
+        resolved = self._lookup(png)
+        return bool(resolved and resolved[1])
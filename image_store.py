@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+以內容定址的圖片儲存 - 內容相同的圖片在同一尺寸只解碼、只保留一份 PhotoImage
+
+鍵值為 (原圖內容雜湊, 尺寸, 縮放濾鏡)：多個按鍵共用同一個檔案（例如 Win.png），
+或使用者放入內容相同的複本時，都會對應到同一個項目。
+內容雜湊在工作執行緒與解碼一起計算；得知雜湊前以 (路徑, 變更次數) 暫代，
+完成後改用雜湊，與已有的相同內容合併。Tk 執行緒上不做任何檔案操作。
+每個使用者（owner，例如某個按鍵的 Canvas）持有一個引用，引用數歸零時釋放圖片。
+owner 在解碼完成前改取其他圖片時，等待中的 callback 改由新的圖片完成；
+直接釋放時則以 on_error 通知，呼叫端不會一直等不到結果。
+除 _load 外，所有方法都只在 Tk 執行緒呼叫。
+"""
+
+import hashlib
+import os
+
+from PIL import Image, ImageTk
+
+
+class _Entry:
+    """一張共用圖片：解碼完成前記錄等待中的 callback"""
+
+    __slots__ = ("photo", "refs", "waiters")
+
+    def __init__(self):
+        self.photo = None
+        self.refs = 0
+        self.waiters = []  # [(owner, callback, on_error)]
+
+
+class ImageStore:
+    """內容定址、引用計數的 PhotoImage 儲存（透過 ImageLoader 在背景解碼）"""
+
+    def __init__(self, loader, digest=None):
+        self.loader = loader
+        self._digest = digest or self._file_digest  # 在工作執行緒呼叫，可共用縮圖快取的雜湊結果
+        self._digests = {}       # {(path, mtime_ns, size): 內容雜湊}，工作執行緒使用
+        self._path_digests = {}  # {normcase(path): 內容雜湊}，載入完成後記下，檔案變更時由 forget 清除
+        self._generations = {}   # {normcase(path): 變更次數}
+        self._entries = {}  # {(雜湊或 ("file", 路徑, 變更次數), 尺寸, 濾鏡): _Entry}
+        self._owners = {}   # {owner: 項目鍵值}
+
+    def _file_digest(self, path):
+        """原圖內容的 SHA-1（依路徑、修改時間與大小記憶結果）"""
+        st = os.stat(path)
+        memo_key = (path, st.st_mtime_ns, st.st_size)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            self._digests[memo_key] = digest
+        return digest
+
+    def _key(self, path, size, resample):
+        """已知內容雜湊時以雜湊為鍵值，否則暫時以路徑與變更次數為鍵值"""
+        name = os.path.normcase(path)
+        digest = self._path_digests.get(name)
+        if digest is None:
+            digest = ("file", name, self._generations.get(name, 0))
+        return (digest, tuple(size), resample)
+
+    def _load(self, path, size, resample):
+        """工作執行緒：計算內容雜湊並產生圖片"""
+        return self._digest(path), self.loader.load(path, size, resample)
+
+    def acquire(self, owner, path, size, callback, resample=Image.Resampling.LANCZOS, on_error=None):
+        """owner 取得一張圖片，完成後呼叫 callback(PhotoImage)；owner 原本持有的圖片會被釋放"""
+        key = self._key(path, size, resample)
+        forwarded = []
+        if self._owners.get(owner) != key:
+            # 原本等待中的 callback 改由這張圖片完成
+            forwarded = self._detach(owner)
+            self._owners[owner] = key
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+                self.loader.run(self._load, (path, size, resample),
+                                lambda result: self._on_loaded(key, path, result),
+                                on_error=lambda e: self._on_error(key, path, e))
+            entry.refs += 1
+        else:
+            entry = self._entries[key]
+
+        waiters = forwarded + [(owner, callback, on_error)]
+        if entry.photo is not None:
+            for _, waiter, _ in waiters:
+                waiter(entry.photo)
+        else:
+            entry.waiters.extend(waiters)
+
+    def forget(self, paths):
+        """檔案內容已變更：之後取得這些路徑時重新計算雜湊並解碼"""
+        for path in paths:
+            name = os.path.normcase(path)
+            self._path_digests.pop(name, None)
+            self._generations[name] = self._generations.get(name, 0) + 1
+
+    def _on_loaded(self, key, path, result):
+        digest, img = result
+        name = os.path.normcase(path)
+        provisional = isinstance(key[0], tuple)
+        if provisional and key[0][2] == self._generations.get(name, 0):
+            self._path_digests[name] = digest  # 之後直接以內容雜湊查詢
+        entry = self._entries.get(key)
+        if entry is None or entry.photo is not None:
+            return  # 解碼期間所有 owner 都已釋放，或相同內容已先完成
+        if provisional:
+            # 改以內容雜湊為鍵值；相同內容的項目已存在時併入該項目
+            content_key = (digest,) + key[1:]
+            del self._entries[key]
+            for owner, owner_key in self._owners.items():
+                if owner_key == key:
+                    self._owners[owner] = content_key
+            shared = self._entries.get(content_key)
+            if shared is not None:
+                shared.refs += entry.refs
+                shared.waiters.extend(entry.waiters)
+                entry = shared
+            else:
+                self._entries[content_key] = entry
+        if entry.photo is None:
+            entry.photo = ImageTk.PhotoImage(img)
+        waiters, entry.waiters = entry.waiters, []
+        for _, callback, _ in waiters:
+            callback(entry.photo)
+
+    def _on_error(self, key, path, error):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        # 失敗的項目不保留，之後再次取得時會重新解碼
+        for owner in [owner for owner, owner_key in self._owners.items() if owner_key == key]:
+            del self._owners[owner]
+        self._fail(entry.waiters, path, error)
+
+    def _fail(self, waiters, path, error):
+        for _, _, on_error in waiters:
+            if on_error:
+                on_error(error)
+            else:
+                print(f"載入圖片 {path} 失敗: {error}")
+
+    def _detach(self, owner):
+        """移除 owner 的引用，回傳它在原本圖片上等待中的 callback"""
+        key = self._owners.pop(owner, None)
+        if key is None:
+            return []
+        entry = self._entries[key]
+        orphaned = [waiter for waiter in entry.waiters if waiter[0] == owner]
+        if orphaned:
+            entry.waiters = [waiter for waiter in entry.waiters if waiter[0] != owner]
+        entry.refs -= 1
+        if entry.refs <= 0:
+            del self._entries[key]
+        return orphaned
+
+    def release(self, owner):
+        """釋放 owner 持有的圖片，引用數歸零時移除；尚未載入完成時以 on_error 通知"""
+        orphaned = self._detach(owner)
+        if orphaned:
+            self._fail(orphaned, owner, RuntimeError("圖片在載入完成前已被釋放"))
+
+    def stats(self):
+        """(引用數, 實際保存的圖片數, 實際位元組數, 未共用時的位元組數)"""
+        refs = images = nbytes = unshared = 0
+        for entry in self._entries.values():
+            refs += entry.refs
+            if entry.photo is None:
+                continue
+            images += 1
+            size = entry.photo.width() * entry.photo.height() * 4  # Tk 以 RGBA 保存像素
+            nbytes += size
+            unshared += size * entry.refs
+        return refs, images, nbytes, unshared
+
+    def report(self):
+        """共用圖片節省的記憶體說明文字"""
+        refs, images, nbytes, unshared = self.stats()
+        return (f"圖片共用: {refs} 個引用共用 {images} 張圖片，"
+                f"使用 {nbytes / 1024:.0f} KB，節省 {(unshared - nbytes) / 1024:.0f} KB")
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+按鍵紀錄 - 保存整個工作階段按下的所有按鍵
+
+每筆紀錄只有按鍵槽位（key_map 中的位置）與按下時間，分別放在兩個
+array 中（每筆 10 bytes），十萬次按鍵約 1 MB；顯示時再依槽位查出名稱與圖片。
+"""
+
+import time
+from array import array
+
+
+class KeyHistory:
+    """按鍵槽位與按下時間的緊密紀錄"""
+
+    def __init__(self):
+        self.slots = array('H')  # 按鍵槽位
+        self.times = array('d')  # 按下時間（time.monotonic()）
+
+    def append(self, slot, timestamp=None):
+        """加入一筆紀錄，回傳其索引"""
+        self.slots.append(slot)
+        self.times.append(time.monotonic() if timestamp is None else timestamp)
+        return len(self.slots) - 1
+
+    def __getitem__(self, index):
+        """第 index 筆紀錄 (槽位, 時間)"""
+        return self.slots[index], self.times[index]
+
+    def __len__(self):
+        return len(self.slots)
+
+    def clear(self):
+        """清空紀錄"""
+        del self.slots[:]
+        del self.times[:]
+
+    @property
+    def nbytes(self):
+        """紀錄佔用的位元組數"""
+        return len(self.slots) * (self.slots.itemsize + self.times.itemsize)
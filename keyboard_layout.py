@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+鍵盤配置定義 - 從 layouts.json 讀取 ANSI / ISO / TKL / 60% 等配置，編譯成幾何表
+
+配置檔中每一區（主鍵區、次鍵區、數字鍵區）是一組列，每列依序列出按鍵：
+    "30"                      一般按鍵（key_id）
+    {"key": "57", "w": 7}     跨 7 欄的按鍵（例如 Space）
+    {"key": "78", "h": 2}     跨 2 列的按鍵（例如 NumAdd）
+    ""                        一格空白（也用於被上一列跨列按鍵佔用的位置）
+
+編譯結果（每個按鍵的像素位置、各區各列的按鍵順序）由鍵盤配置分頁、按鍵列表分頁
+與按鍵即時標示共用，並寫入快取檔，配置與按鍵尺寸不變時啟動直接讀取。
+"""
+
+import hashlib
+import json
+import os
+
+COMPILED_VERSION = 1
+
+
+class KeyCell:
+    """鍵盤上的一個按鍵位置（像素座標）"""
+
+    __slots__ = ("key_id", "x", "y", "w", "h", "width_mult", "height_mult")
+
+    def __init__(self, key_id, x, y, w, h, width_mult=1, height_mult=1):
+        self.key_id = key_id
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.width_mult = width_mult
+        self.height_mult = height_mult
+
+
+def parse_layout_key(entry):
+    """配置檔中的一個按鍵 → (key_id, 跨欄, 跨列)"""
+    if isinstance(entry, dict):
+        return str(entry.get("key", "")), int(entry.get("w", 1)), int(entry.get("h", 1))
+    return ("" if entry is None else str(entry)), 1, 1
+
+
+class KeyboardLayout:
+    """編譯後的鍵盤配置"""
+
+    def __init__(self, name, title, sections, cells):
+        self.name = name
+        self.title = title
+        self.sections = sections  # [(區名, [[key_id, ...], ...])]，每列只含實際按鍵
+        self.cells = cells        # [KeyCell]
+        self.cells_by_key = {}    # {key_id: [按鍵索引]}，同一個按鍵可能出現在多個位置
+        for index, cell in enumerate(cells):
+            self.cells_by_key.setdefault(cell.key_id, []).append(index)
+
+    @classmethod
+    def compile(cls, name, definition, unit_w, unit_h, pad=2, section_gap=20, origin=(10, 30)):
+        """把配置定義換算成像素位置；各區由左到右排列，區與區之間相隔 section_gap"""
+        sections = []
+        cells = []
+        x0, y0 = origin
+        for section in definition.get("sections", []):
+            section_rows = []
+            columns = 0
+            for row_idx, row in enumerate(section.get("rows", [])):
+                row_keys = []
+                col_idx = 0
+                for entry in row:
+                    key_id, colspan, rowspan = parse_layout_key(entry)
+                    if key_id:
+                        cells.append(KeyCell(key_id, x0 + col_idx * unit_w + pad, y0 + row_idx * unit_h + pad,
+                                             colspan * unit_w - 2 * pad, rowspan * unit_h - 2 * pad,
+                                             colspan, rowspan))
+                        row_keys.append(key_id)
+                    col_idx += colspan
+                columns = max(columns, col_idx)
+                section_rows.append(row_keys)
+            sections.append((section.get("name", ""), section_rows))
+            x0 += columns * unit_w + section_gap
+        return cls(name, definition.get("name", name), sections, cells)
+
+    def to_json(self):
+        return {"name": self.name, "title": self.title,
+                "sections": [[name, rows] for name, rows in self.sections],
+                "cells": [[cell.key_id, cell.x, cell.y, cell.w, cell.h, cell.width_mult, cell.height_mult]
+                          for cell in self.cells]}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["name"], data["title"], [tuple(section) for section in data["sections"]],
+                   [KeyCell(*cell) for cell in data["cells"]])
+
+    @classmethod
+    def load(cls, path="layouts.json", name=None, default=None, unit_size=(76, 58), cache_dir=None):
+        """讀取配置檔並取得指定的配置；提供 default 時讀取失敗會改用 default"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                layouts_data = json.load(f)
+            print("已載入外部鍵盤配置檔")
+        except FileNotFoundError:
+            if default is None:
+                raise
+            print(f"找不到 {path} 檔案，使用內建鍵盤配置")
+            layouts_data = default
+        except Exception as e:
+            if default is None:
+                raise
+            print(f"讀取 {path} 失敗: {e}，使用內建鍵盤配置")
+            layouts_data = default
+
+        layouts = layouts_data.get("layouts", {})
+        if name not in layouts:
+            fallback = layouts_data.get("default") if layouts_data.get("default") in layouts else next(iter(layouts), None)
+            if name is not None:
+                print(f"找不到鍵盤配置 {name}，使用 {fallback}")
+            name = fallback
+        if name is None:
+            return cls("", "", [], [])
+        definition = layouts[name]
+
+        # 配置定義與按鍵尺寸都沒變時直接使用上次編譯的結果
+        digest = hashlib.sha1(json.dumps([COMPILED_VERSION, definition, list(unit_size)],
+                                         sort_keys=True).encode("utf-8")).hexdigest()
+        cache_path = os.path.join(cache_dir, f"layout_{name}.json") if cache_dir else None
+        if cache_path:
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                if cached.get("digest") == digest:
+                    return cls.from_json(cached["layout"])
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+
+        layout = cls.compile(name, definition, *unit_size)
+        if cache_path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump({"digest": digest, "layout": layout.to_json()}, f, ensure_ascii=False)
+                os.replace(cache_path + ".tmp", cache_path)
+            except OSError as e:
+                print(f"寫入鍵盤配置快取失敗: {e}")
+        return layout
+
+    def __len__(self):
+        return len(self.cells)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+按鍵映射 - 載入 key_map.json 一次，並建立各種 O(1) 查詢索引
+
+- KeyTable：以 (scan_code, is_keypad) 為索引的陣列，按鍵時不需組字串查表
+- KeyMap：依複合鍵值、key_id、名稱、圖片檔名查詢，並檢查重複定義
+"""
+
+import json
+
+
+class KeyRecord:
+    """單一按鍵的資訊"""
+
+    __slots__ = ('slot', 'scan_code', 'is_keypad', 'key_id', 'name', 'png')
+
+    def __init__(self, slot, scan_code, is_keypad, key_id, name, png):
+        self.slot = slot            # 在 records 中的位置（0 ~ n-1）
+        self.scan_code = scan_code
+        self.is_keypad = is_keypad
+        self.key_id = key_id
+        self.name = name
+        self.png = png
+
+    @property
+    def composite_key(self):
+        """原始 key_map.json 的鍵值格式"""
+        return f"{self.scan_code}:{self.is_keypad}"
+
+    def __repr__(self):
+        return f"KeyRecord({self.composite_key!r}, key_id={self.key_id!r}, name={self.name!r}, png={self.png!r})"
+
+
+def parse_composite_key(composite_key):
+    """把 "55:False" 拆成 (55, False)"""
+    scan_code, is_keypad = composite_key.split(":")
+    return int(scan_code), is_keypad == "True"
+
+
+def table_index(scan_code, is_keypad):
+    """(scan_code, is_keypad) 在查詢表中的位置"""
+    return scan_code * 2 + bool(is_keypad)
+
+
+class KeyTable:
+    """以 (scan_code, is_keypad) 為索引的按鍵查詢表"""
+
+    __slots__ = ('records', 'table')
+
+    def __init__(self, records):
+        size = max((table_index(r.scan_code, r.is_keypad) for r in records), default=-1) + 1
+        table = [None] * size
+        for record in records:
+            table[table_index(record.scan_code, record.is_keypad)] = record
+
+        self.records = tuple(records)
+        self.table = tuple(table)
+
+    def lookup(self, scan_code, is_keypad):
+        """依 scan_code 與 is_keypad 取得 KeyRecord，沒有定義則回傳 None"""
+        index = scan_code * 2 + bool(is_keypad)
+        if 0 <= index < len(self.table):
+            return self.table[index]
+        return None
+
+    def __len__(self):
+        return len(self.records)
+
+
+class KeyMap:
+    """按鍵映射與查詢索引"""
+
+    def __init__(self, key_map_data, duplicates=()):
+        self.data = key_map_data
+        self.warnings = [f"重複的按鍵鍵值: {key}" for key in duplicates]
+
+        records = []
+        self._by_composite = {}
+        self._by_key_id = {}
+        self._by_name = {}
+        self._by_png = {}
+        for composite_key, info in key_map_data.items():
+            try:
+                scan_code, is_keypad = parse_composite_key(composite_key)
+            except ValueError:
+                self.warnings.append(f"無效的按鍵鍵值: {composite_key}，跳過")
+                continue
+
+            name = info.get("name", f"Key{scan_code}")
+            record = KeyRecord(len(records), scan_code, is_keypad,
+                               info.get("key_id", str(scan_code)), name,
+                               info.get("png", f"{name}.png"))
+
+            if record.key_id in self._by_key_id:
+                self.warnings.append(
+                    f"重複的 key_id {record.key_id}: {self._by_key_id[record.key_id].composite_key} 與 {composite_key}")
+                continue
+
+            records.append(record)
+            self._by_composite[composite_key] = record
+            self._by_key_id[record.key_id] = record
+            self._by_name.setdefault(record.name, []).append(record)
+            self._by_png.setdefault(record.png, []).append(record)
+
+        self.table = KeyTable(records)
+        self.records = self.table.records
+
+        for warning in self.warnings:
+            print(warning)
+
+    @classmethod
+    def load(cls, path="key_map.json", default=None):
+        """讀取按鍵映射檔案；提供 default 時讀取失敗會改用 default"""
+        duplicates = []
+
+        def check_duplicates(pairs):
+            seen = set()
+            for key, _ in pairs:
+                if key in seen:
+                    duplicates.append(key)
+                seen.add(key)
+            return dict(pairs)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                key_map_data = json.load(f, object_pairs_hook=check_duplicates)
+            print("已載入外部按鍵映射檔")
+        except FileNotFoundError:
+            if default is None:
+                raise
+            print(f"找不到 {path} 檔案，使用內建按鍵映射")
+            return cls(dict(default))
+        except Exception as e:
+            if default is None:
+                raise
+            print(f"讀取 {path} 失敗: {e}，使用內建按鍵映射")
+            return cls(dict(default))
+
+        return cls(key_map_data, duplicates)
+
+    def lookup(self, scan_code, is_keypad):
+        """依 scan_code 與 is_keypad 取得 KeyRecord"""
+        return self.table.lookup(scan_code, is_keypad)
+
+    def by_composite(self, composite_key):
+        """依 "scan_code:is_keypad" 取得 KeyRecord"""
+        return self._by_composite.get(composite_key)
+
+    def by_key_id(self, key_id):
+        """依 key_id 取得 KeyRecord"""
+        return self._by_key_id.get(key_id)
+
+    def by_name(self, name):
+        """依按鍵名稱取得所有 KeyRecord（主鍵盤與數字鍵盤可能同名）"""
+        return tuple(self._by_name.get(name, ()))
+
+    def by_png(self, png):
+        """依圖片檔名取得所有使用該圖片的 KeyRecord"""
+        return tuple(self._by_png.get(png, ()))
+
+    def pngs(self):
+        """所有用到的圖片檔名（不重複，依 key_map 順序）"""
+        return list(self._by_png)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+
+class PressedKeys:
+    """目前按住的按鍵，以 KeyRecord.slot 為索引的位元組陣列
+
+    主鍵盤與數字鍵盤的同名按鍵（Enter、-、. 等）各自有獨立的槽位，
+    檢查是否已按下只需讀取一個位元組。
+    """
+
+    __slots__ = ('_state', 'count')
+
+    def __init__(self, size):
+        self._state = bytearray(size)
+        self.count = 0
+
+    def press(self, slot):
+        """標記為按下；已經是按下狀態（自動重複）時回傳 False"""
+        if self._state[slot]:
+            return False
+        self._state[slot] = 1
+        self.count += 1
+        return True
+
+    def release(self, slot):
+        """標記為放開"""
+        if self._state[slot]:
+            self._state[slot] = 0
+            self.count -= 1
+
+    def is_pressed(self, slot):
+        return self._state[slot] == 1
+
+    def clear(self):
+        """全部標記為放開"""
+        if self.count:
+            self._state[:] = bytes(len(self._state))
+            self.count = 0
+
+    def snapshot(self):
+        """目前按下狀態的複本（bytes）"""
+        return bytes(self._state)
+
+    def slots(self):
+        """目前按下的所有槽位（依槽位順序）"""
+        return [slot for slot, pressed in enumerate(self._state) if pressed]
+
+    def __len__(self):
+        return self.count
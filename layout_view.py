@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+鍵盤配置畫面 - 整個鍵盤（主鍵區、次鍵區、數字鍵區）畫在同一個 Canvas 上
+
+每個按鍵是三個 Canvas 項目（圓角外框、圖片、文字），位置來自編譯好的鍵盤配置（KeyCell）；
+換圖片或改顏色只需 itemconfigure，不必建立或銷毀元件。
+"""
+
+import tkinter as tk
+
+
+def create_rounded_rectangle(canvas, x1, y1, x2, y2, radius=10, **kwargs):
+    """在 Canvas 上繪製圓角矩形"""
+    # 使用更平滑的圓角繪製方法
+    # 創建圓角的弧線
+    points = []
+
+    # 上邊線
+    points.extend([x1 + radius, y1])
+    points.extend([x2 - radius, y1])
+
+    # 右上角
+    points.extend([x2, y1])
+    points.extend([x2, y1 + radius])
+
+    # 右邊線
+    points.extend([x2, y2 - radius])
+
+    # 右下角
+    points.extend([x2, y2])
+    points.extend([x2 - radius, y2])
+
+    # 下邊線
+    points.extend([x1 + radius, y2])
+
+    # 左下角
+    points.extend([x1, y2])
+    points.extend([x1, y2 - radius])
+
+    # 左邊線
+    points.extend([x1, y1 + radius])
+
+    # 左上角
+    points.extend([x1, y1])
+
+    # 創建平滑的圓角矩形
+    return canvas.create_polygon(points, smooth=True, **kwargs)
+
+
+class KeyboardCanvas:
+    """以單一 Canvas 顯示整個鍵盤配置"""
+
+    def __init__(self, parent, cells, labels, radius=8, border_width=2, font=('Arial', 10),
+                 on_enter=None, on_leave=None, highlight_fill='#FFE082', highlight_outline='#FF6F00'):
+        self.cells = list(cells)
+        self.images = [None] * len(self.cells)  # 各按鍵目前的圖片引用，防止垃圾回收
+        self.border_width = border_width
+        self.highlight_fill = highlight_fill
+        self.highlight_outline = highlight_outline
+        self._lit = bytearray(len(self.cells))  # 各按鍵是否正被標示
+        self.items = []        # [(外框, 圖片, 文字)]，與 cells 同順序
+        self._item_cells = {}  # {外框項目: 按鍵索引}，供滑鼠事件查詢
+        width = max((cell.x + cell.w for cell in self.cells), default=0) + 10
+        height = max((cell.y + cell.h for cell in self.cells), default=0) + 10
+        self.canvas = tk.Canvas(parent, width=width, height=height, highlightthickness=0)
+
+        half = border_width // 2
+        for index, cell in enumerate(self.cells):
+            rect = create_rounded_rectangle(self.canvas, cell.x + half, cell.y + half,
+                                            cell.x + cell.w - half, cell.y + cell.h - half,
+                                            radius=radius, fill='white', outline='black',
+                                            width=border_width, tags=('key',))
+            cx, cy = cell.x + cell.w // 2, cell.y + cell.h // 2
+            # 圖片與文字不接收滑鼠事件，游標在按鍵上時一律對應到外框
+            image = self.canvas.create_image(cx, cy, state='disabled')
+            text = self.canvas.create_text(cx, cy, text=labels[index], font=font, fill='black',
+                                           state='disabled')
+            self.items.append((rect, image, text))
+            self._item_cells[rect] = index
+
+        if on_enter is not None:
+            self.canvas.tag_bind('key', '<Enter>', lambda e: on_enter(e, self._current_cell()))
+        if on_leave is not None:
+            self.canvas.tag_bind('key', '<Leave>', lambda e: on_leave())
+
+    def _current_cell(self):
+        """游標所在的按鍵索引"""
+        current = self.canvas.find_withtag('current')
+        return self._item_cells.get(current[0]) if current else None
+
+    def set_image(self, index, image):
+        """換上按鍵圖片（None 時改回顯示文字）"""
+        _, image_item, text_item = self.items[index]
+        self.canvas.itemconfigure(image_item, image=image or '')
+        self.canvas.itemconfigure(text_item, state='hidden' if image else 'disabled')
+        self.images[index] = image
+
+    def set_highlight(self, index, lit):
+        """標示或取消標示按鍵（狀態沒變時不做任何事）"""
+        if self._lit[index] == lit:
+            return
+        self._lit[index] = lit
+        rect = self.items[index][0]
+        if lit:
+            self.canvas.itemconfigure(rect, fill=self.highlight_fill, outline=self.highlight_outline,
+                                      width=self.border_width + 2)
+        else:
+            self.canvas.itemconfigure(rect, fill='white', outline='black', width=self.border_width)
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
@@ -1,10 +1,25 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
+from PIL import Image
 import keyboard
 import os
 import json
 import time
+import threading
+from collections import deque
+from sprite_cache import SpriteCache, compose_sprites
+from keymap import KeyMap, PressedKeys
+from image_loader import ImageLoader
+from thumbnail_cache import ThumbnailCache
+from dir_watcher import DirectoryWatcher
+from image_paths import ImagePathResolver
+from image_store import ImageStore
+from atlas import TextureAtlas
+from realtime_view import LabelKeyStrip, CanvasKeyStrip, HistoryKeyStrip, RenderScheduler
+from key_history import KeyHistory
+from timer_wheel import TimerWheel
+from layout_view import KeyboardCanvas
+from keyboard_layout import KeyboardLayout
 
 root = tk.Tk()
 root.title("KeyBoard")
@@ -27,7 +42,19 @@ except ImportError:
         "realtime_image_size": [80,80],
         "max_keys_per_row": 10,
         "max_rows": 3,
-        "realtime_background": "default"
+        "realtime_background": "default",
+        "realtime_renderer": "label",
+        "realtime_fps": 60,
+        "thumbnail_cache_dir": "cache",
+        "thumbnail_cache_max_mb": 64,
+        "sprite_cache_max_mb": 16,
+        "prewarm_tabs": True,
+        "keyboard_layout": "ansi",
+        "key_expire_ms": 0,
+        "key_fade_ms": 300,
+        "key_fade_steps": 4,
+        "chord_mode": False,
+        "chord_cache_max_mb": 4
     }
     print("使用硬編碼預設設定")
 
@@ -47,7 +74,6 @@ else:
     print("使用內建設定檔")
 
 # 從 config 讀取所有設定，如果 config 中沒有該項目，則使用 DEFAULT_CONFIG 的預設值
-IMAGE_SIZE = tuple(config.get("image_size", DEFAULT_CONFIG["image_size"]))
 DEFAULT_DIR = config.get("default_dir", DEFAULT_CONFIG["default_dir"])
 USER_DIR = config.get("user_dir", DEFAULT_CONFIG["user_dir"])
 KEY_W = config.get("key_w", DEFAULT_CONFIG["key_w"])
@@ -58,11 +84,69 @@ REALTIME_IMAGE_SIZE = tuple(config.get("realtime_image_size", DEFAULT_CONFIG["re
 MAX_KEYS_PER_ROW = config.get("max_keys_per_row", DEFAULT_CONFIG["max_keys_per_row"])
 MAX_ROWS = config.get("max_rows", DEFAULT_CONFIG["max_rows"])
 REALTIME_BACKGROUND = config.get("realtime_background", DEFAULT_CONFIG["realtime_background"])
+REALTIME_RENDERER = config.get("realtime_renderer", DEFAULT_CONFIG["realtime_renderer"])
+REALTIME_FPS = config.get("realtime_fps", DEFAULT_CONFIG["realtime_fps"])
+THUMBNAIL_CACHE_DIR = config.get("thumbnail_cache_dir", DEFAULT_CONFIG["thumbnail_cache_dir"])
+THUMBNAIL_CACHE_MAX_MB = config.get("thumbnail_cache_max_mb", DEFAULT_CONFIG["thumbnail_cache_max_mb"])
+SPRITE_CACHE_MAX_MB = config.get("sprite_cache_max_mb", DEFAULT_CONFIG["sprite_cache_max_mb"])
+PREWARM_TABS = config.get("prewarm_tabs", DEFAULT_CONFIG["prewarm_tabs"])
+KEYBOARD_LAYOUT = config.get("keyboard_layout", DEFAULT_CONFIG["keyboard_layout"])
+KEY_EXPIRE_MS = config.get("key_expire_ms", DEFAULT_CONFIG["key_expire_ms"])
+KEY_FADE_MS = min(config.get("key_fade_ms", DEFAULT_CONFIG["key_fade_ms"]), KEY_EXPIRE_MS)
+KEY_FADE_STEPS = config.get("key_fade_steps", DEFAULT_CONFIG["key_fade_steps"])
+CHORD_MODE = config.get("chord_mode", DEFAULT_CONFIG["chord_mode"])
+CHORD_CACHE_MAX_MB = config.get("chord_cache_max_mb", DEFAULT_CONFIG["chord_cache_max_mb"])
 
 # 全域變數
-pressed_keys = {}   # {key: Label物件}
-key_images = {}     # {key: ImageTk物件}
-image_mtime = {}    # {path: 最後修改時間}
+key_strip = None    # 即時按鍵顯示槽（HistoryKeyStrip、LabelKeyStrip 或 CanvasKeyStrip）
+key_history = KeyHistory()   # 整個工作階段的按鍵紀錄（history 顯示方式使用）
+history_expired = 0      # 按鍵紀錄中第一筆尚未過期的索引
+strip_keys = deque()     # label / canvas 顯示方式中各按鍵的 (按下時間, 槽位)，由舊到新
+expiry_wheel = TimerWheel(root)  # 按鍵淡出與消失的計時（所有按鍵共用一個 after）
+expiry_scheduled_tick = None     # 最近一次排程淡出計時時的刻度
+expiry_due = False       # 下一個畫格是否需要更新淡出與消失
+render_scheduler = None  # 即時按鍵重繪排程（RenderScheduler）
+pending_keys = []   # 尚未繪製的按鍵 [(ImageTk物件, 按鍵名稱)]
+pending_clear = False    # 下一次重繪前是否需要先清空
+realtime_key_count = 0   # 即時按鍵數量（含尚未繪製的）
+realtime_sprite_requests = set()  # 已排入或正在產生的即時按鍵圖片 (png, 尺寸, 背景)
+queued_realtime_sprites = []      # 已排入、尚未交給圖片儲存的即時按鍵圖片
+
+def realtime_sprite_in_use(sprite):
+    """圖片是否正顯示在即時按鍵區，或正等待繪製（這些圖片不會被快取淘汰）"""
+    return (key_strip is not None and key_strip.shows(sprite)) or \
+        any(pending is sprite for pending, _ in pending_keys)
+
+def on_realtime_sprite_evicted(png, size, background):
+    """即時按鍵圖片被淘汰時，一併釋放圖片儲存中的引用"""
+    image_store.release(("realtime", png, size, background))
+
+# 即時按鍵圖片快取（超過記憶體上限時淘汰最久沒用到的圖片）
+realtime_sprites = SpriteCache(SPRITE_CACHE_MAX_MB * 1024 * 1024, in_use=realtime_sprite_in_use,
+                               on_evict=on_realtime_sprite_evicted, fade_steps=KEY_FADE_STEPS)
+# 組合鍵合成圖片快取（以組合中各按鍵的圖片檔名為鍵值，重複的快捷鍵不必重新合成）
+chord_sprites = SpriteCache(CHORD_CACHE_MAX_MB * 1024 * 1024, in_use=realtime_sprite_in_use,
+                            fade_steps=KEY_FADE_STEPS)
+
+# 縮圖磁碟快取（無法建立快取目錄時直接解碼原圖）
+try:
+    thumbnail_cache = ThumbnailCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_MB * 1024 * 1024)
+except Exception as e:
+    print(f"無法建立縮圖快取 {THUMBNAIL_CACHE_DIR}: {e}")
+    thumbnail_cache = None
+# 按鍵原圖 atlas（與縮圖快取放在同一個目錄，縮圖快取只管理自己的檔案），啟動時只需讀取一張圖片
+try:
+    texture_atlas = TextureAtlas(THUMBNAIL_CACHE_DIR)
+except Exception as e:
+    print(f"無法建立 atlas {THUMBNAIL_CACHE_DIR}: {e}")
+    texture_atlas = None
+image_loader = ImageLoader(root, thumbnail_cache=thumbnail_cache, atlas=texture_atlas)  # 背景圖片解碼（執行緒池）
+# 內容相同的圖片在同一尺寸只保留一份（與縮圖快取共用內容雜湊）
+image_store = ImageStore(image_loader, digest=thumbnail_cache.digest if thumbnail_cache else None)
+keyboard_view = None     # 鍵盤配置分頁的 KeyboardCanvas（分頁建立後才有）
+layout_cells = {}   # {png: [鍵盤配置分頁中使用該圖片的按鍵索引]}
+layout_slot_cells = []   # [按鍵槽位 → 鍵盤配置分頁中該按鍵的索引]，供按住時標示
+image_paths = ImagePathResolver(USER_DIR, DEFAULT_DIR)  # user / default 圖片路徑解析
 tooltip = None      # 工具提示視窗
 
 # 從內建資源檔案讀取預設按鍵映射
@@ -155,6 +239,7 @@ except ImportError:
     "81:True": {"key_id": "81", "name": "Num3", "png": "Num3.png"},
     "82:True": {"key_id": "82", "name": "Num0", "png": "Num0.png"},
     "83:True": {"key_id": "83", "name": ".", "png": "NumDecimal.png"},
+    "86:False": {"key_id": "86", "name": "IntlBackslash", "png": "IntlBackslash.png"},
     "87:False": {"key_id": "87", "name": "F11", "png": "F11.png"},
     "88:False": {"key_id": "88", "name": "F12", "png": "F12.png"},
     "91:False": {"key_id": "91", "name": "Win", "png": "Win.png"},
@@ -183,206 +268,80 @@ except ImportError:
 
 # 讀取key_map.json
 def load_key_map():
-    """載入按鍵映射檔案"""
-    try:
-        with open("key_map.json", "r", encoding="utf-8") as f:
-            key_map_data = json.load(f)
-            print("已載入外部按鍵映射檔")
-            return key_map_data
-    except FileNotFoundError:
-        print("找不到 key_map.json 檔案，使用內建按鍵映射")
-        return DEFAULT_KEY_MAP.copy()
-    except Exception as e:
-        print(f"讀取 key_map.json 失敗: {e}，使用內建按鍵映射")
-        return DEFAULT_KEY_MAP.copy()
+    """載入按鍵映射檔案，讀取失敗時使用內建按鍵映射"""
+    return KeyMap.load("key_map.json", default=DEFAULT_KEY_MAP)
 
-# 載入 key_map（全域變數）
+# 載入 key_map（全域變數），建立 scan_code / key_id / 名稱 / 圖片檔名索引
 key_map = load_key_map()
 
-def create_rounded_image_label(parent, image_tk, width_mult=1, height_mult=1):
-    """創建帶有圓角邊框的圖片標籤"""
-    # 計算按鍵大小
-    keyboard_key_width = KEY_W * 9 * width_mult
-    keyboard_key_height = KEY_H * 18 * height_mult
-    
-    # 創建 Canvas 來繪製圓角邊框
-    canvas = tk.Canvas(parent, width=keyboard_key_width, height=keyboard_key_height,
-                      bg='white', highlightthickness=0, relief='flat')
-    
-    # 繪製圓角矩形邊框
-    border_width = 2  # 減少邊框寬度，讓邊線更細
-    corner_radius = 8  # 保持圓角半徑
-    
-    # 外框（黑色）
-    canvas.create_rounded_rectangle(
-        border_width//2, border_width//2, 
-        keyboard_key_width - border_width//2, keyboard_key_height - border_width//2,
-        radius=corner_radius, fill='white', outline='black', width=border_width
-    )
-    
-    # 創建圖片標籤
-    label = tk.Label(canvas, image=image_tk, bg='white', relief='flat', borderwidth=0)
-    
-    # 將圖片標籤放置在 Canvas 中央
-    canvas.create_window(keyboard_key_width//2, keyboard_key_height//2, window=label)
-    
-    return canvas
-
-def create_key_image_label(parent, key_id, width_mult=1, height_mult=1, columnspan=1, rowspan=1):
-    """創建按鍵圖片標籤"""
-    if key_id == '':
-        # 空按鍵
-        return tk.Label(parent, text='', width=KEY_W*width_mult, height=KEY_H*height_mult, 
-                       borderwidth=0, highlightthickness=0)
-    else:
-        # 根據 key_id 從 key_map 獲取按鍵資訊
-        # 需要遍歷 key_map 找到對應的 key_id
-        key_info = None
-        for composite_key, info in key_map.items():
-            if info["key_id"] == key_id:
-                key_info = info
-                break
-        
-        if key_info:
-            key_name = key_info["name"]
-            image_filename = key_info["png"]
-            
-            # 檢查圖片是否已載入
-            if image_filename in key_images:
-                # 檢查圖片來源（user 或 default 資料夾）
-                user_path = os.path.join(USER_DIR, image_filename)
-                is_user_image = os.path.exists(user_path)
-                
-                if is_user_image:
-                    # 使用者圖片：使用固定的 48x48 大小，在按鍵內置中顯示
-                    try:
-                        # 創建 48x48 的圖片
-                        img = Image.open(user_path).resize((48, 48), Image.Resampling.LANCZOS)
-                        img_tk = ImageTk.PhotoImage(img)
-                        
-                        # 創建帶有圓角邊框的圖片標籤
-                        canvas = create_rounded_image_label(parent, img_tk, width_mult, height_mult)
-                        
-                        # 保存圖片引用以防止垃圾回收
-                        canvas.image = img_tk
-                        
-                        # 設定工具提示顯示按鍵名稱
-                        canvas.bind('<Enter>', lambda e, name=key_name: show_tooltip(e, name))
-                        canvas.bind('<Leave>', lambda e: hide_tooltip())
-                        
-                        return canvas
-                        
-                    except Exception as e:
-                        print(f"創建使用者按鍵圖片失敗 {key_id}: {e}")
-                        # 降級為文字標籤
-                        return create_rounded_text_label(parent, key_name, width_mult, height_mult, key_id)
-                else:
-                    # 預設圖片：根據按鍵大小進行縮放
-                    try:
-                        # 計算鍵盤配置中按鍵的實際像素大小
-                        keyboard_key_width = KEY_W * 8  # 8 是 Tkinter 文字單位的像素轉換
-                        keyboard_key_height = KEY_H * 16  # 16 是 Tkinter 文字單位的像素轉換
-                        
-                        # 調整圖片大小以匹配按鍵大小
-                        img = Image.open(os.path.join(DEFAULT_DIR, image_filename))
-                        img_resized = img.resize((keyboard_key_width * width_mult, keyboard_key_height * height_mult), Image.Resampling.LANCZOS)
-                        img_tk = ImageTk.PhotoImage(img_resized)
-                        
-                        # 創建帶有圓角邊框的圖片標籤
-                        canvas = create_rounded_image_label(parent, img_tk, width_mult, height_mult)
-                        
-                        # 保存圖片引用以防止垃圾回收
-                        canvas.image = img_tk
-                        
-                        # 設定工具提示顯示按鍵名稱
-                        canvas.bind('<Enter>', lambda e, name=key_name: show_tooltip(e, name))
-                        canvas.bind('<Leave>', lambda e: hide_tooltip())
-                        
-                        return canvas
-                        
-                    except Exception as e:
-                        print(f"創建預設按鍵圖片失敗 {key_id}: {e}")
-                        # 降級為文字標籤
-                        return create_rounded_text_label(parent, key_name, width_mult, height_mult)
-            else:
-                # 圖片未載入，使用文字標籤
-                print(f"圖片未載入: {image_filename}")
-                return create_rounded_text_label(parent, key_name, width_mult, height_mult)
-        else:
-            # 找不到按鍵資訊，使用 ID 作為文字
-            print(f"找不到按鍵資訊: {key_id}")
-            return create_rounded_text_label(parent, key_id, width_mult, height_mult)
-
-def create_rounded_text_label(parent, text, width_mult=1, height_mult=1):
-    """創建帶有圓角邊框的文字標籤"""
-    # 計算按鍵大小
-    keyboard_key_width = KEY_W * 8 * width_mult
-    keyboard_key_height = KEY_H * 16 * height_mult
-    
-    # 創建 Canvas 來繪製圓角邊框
-    canvas = tk.Canvas(parent, width=keyboard_key_width, height=keyboard_key_height,
-                      bg='white', highlightthickness=0, relief='flat')
-    
-    # 繪製圓角矩形邊框
-    border_width = 1  # 減少邊框寬度，讓邊線更細
-    corner_radius = 8  # 保持圓角半徑
-    
-    # 外框（黑色）
-    canvas.create_rounded_rectangle(
-        border_width//2, border_width//2, 
-        keyboard_key_width - border_width//2, keyboard_key_height - border_width//2,
-        radius=corner_radius, fill='white', outline='black', width=border_width
-    )
-    
-    # 創建文字標籤
-    label = tk.Label(canvas, text=text, bg='white', fg='black', relief='flat', borderwidth=0,
-                     font=('Arial', 10), anchor='center')
-    
-    # 將文字標籤放置在 Canvas 中央
-    canvas.create_window(keyboard_key_width//2, keyboard_key_height//2, window=label)
-    
-    return canvas
-
-# 為 Canvas 添加圓角矩形繪製方法
-def create_rounded_rectangle(canvas, x1, y1, x2, y2, radius=10, **kwargs):
-    """在 Canvas 上繪製圓角矩形"""
-    # 使用更平滑的圓角繪製方法
-    # 創建圓角的弧線
-    points = []
-    
-    # 上邊線
-    points.extend([x1 + radius, y1])
-    points.extend([x2 - radius, y1])
-    
-    # 右上角
-    points.extend([x2, y1])
-    points.extend([x2, y1 + radius])
-    
-    # 右邊線
-    points.extend([x2, y2 - radius])
-    
-    # 右下角
-    points.extend([x2, y2])
-    points.extend([x2 - radius, y2])
-    
-    # 下邊線
-    points.extend([x1 + radius, y2])
-    
-    # 左下角
-    points.extend([x1, y2])
-    points.extend([x1, y2 - radius])
+# 組合鍵：按住修飾鍵時按下的其他按鍵合併成一個圖片（chord_mode 開啟時）
+# 出現過的組合依序編號在按鍵槽位之後（len(key_map) 起），可與一般按鍵一樣存入按鍵紀錄
+CHORD_MODIFIERS = ("CtrlLeft", "ShiftLeft", "AltLeft", "Win")
+chord_modifier_slots = [record.slot for name in CHORD_MODIFIERS for record in key_map.by_name(name)]
+chords = []             # [(修飾鍵槽位..., 按鍵槽位)]
+chord_tile_slots = {}   # {組合: 顯示用槽位}
+held_modifiers = set()  # 正按住、尚未顯示的修飾鍵槽位
+used_modifiers = set()  # 按住期間已組成組合鍵的修飾鍵槽位
+
+# 從內建資源檔案讀取預設鍵盤配置
+try:
+    from resources import DEFAULT_LAYOUTS
+except ImportError:
+    # 如果無法載入資源檔案，使用只有 ANSI 配置的硬編碼預設值
+    DEFAULT_LAYOUTS = {"default": "ansi", "layouts": {"ansi": {"name": "ANSI 全尺寸", "sections": [
+        {"name": "主鍵區", "rows": [
+            ["1", "59", "60", "61", "62", "63", "64", "65", "66", "67", "68", "87", "88"],
+            ["41", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14"],
+            ["15", "16", "17", "18", "19", "20", "21", "22", "23", "24", "25", "26", "27", "43"],
+            ["58", "30", "31", "32", "33", "34", "35", "36", "37", "38", "39", "40", {"key": "28", "w": 2}],
+            [{"key": "42", "w": 2}, "44", "45", "46", "47", "48", "49", "50", "51", "52", "53", {"key": "54", "w": 2}],
+            ["29", "91", "56", {"key": "57", "w": 7}, "100", "92", "93", "97"]
+        ]},
+        {"name": "次鍵區", "rows": [
+            ["99", "70", "119"], ["110", "101", "103"], ["111", "107", "109"],
+            ["", "", ""], ["", "102", ""], ["104", "108", "106"]
+        ]},
+        {"name": "數字鍵區", "rows": [
+            ["", "", "", ""], ["69", "98", "55", "74"], ["71", "72", "73", {"key": "78", "h": 2}],
+            ["75", "76", "77", ""], ["79", "80", "81", {"key": "96", "h": 2}], [{"key": "82", "w": 2}, "83", ""]
+        ]}
+    ]}}}
+
+# 讀取並編譯鍵盤配置（鍵盤配置分頁、按鍵列表與按鍵標示共用；編譯結果快取在縮圖快取目錄）
+keyboard_layout = KeyboardLayout.load("layouts.json", KEYBOARD_LAYOUT, default=DEFAULT_LAYOUTS,
+                                      unit_size=(KEY_W * 9 + 4, KEY_H * 18 + 4),
+                                      cache_dir=THUMBNAIL_CACHE_DIR)
+
+def get_layout_image_size(is_user_image, width_mult=1, height_mult=1):
+    """鍵盤配置分頁中按鍵圖片的大小"""
+    if is_user_image:
+        # 使用者圖片：使用固定的 48x48 大小，在按鍵內置中顯示
+        return (48, 48)
+    # 預設圖片：根據按鍵大小進行縮放（8、16 是 Tkinter 文字單位的像素轉換）
+    return (KEY_W * 8 * width_mult, KEY_H * 16 * height_mult)
+
+def load_layout_image(index):
+    """在背景載入鍵盤配置分頁中一個按鍵的圖片，找不到圖片時保留按鍵名稱"""
+    cell = keyboard_view.cells[index]
+    key_info = key_map.by_key_id(cell.key_id)
+    if key_info is None:
+        print(f"找不到按鍵資訊: {cell.key_id}")
+        return
+    image_filename = key_info.png
     
-    # 左邊線
-    points.extend([x1, y1 + radius])
+    # 登記使用這張圖片的按鍵，圖片新增或變更時直接換上新圖片
+    layout_cells.setdefault(image_filename, []).append(index)
     
-    # 左上角
-    points.extend([x1, y1])
+    # 檢查圖片來源（user 或 default 資料夾）
+    path = image_paths.resolve(image_filename)
+    if not path:
+        print(f"圖片未載入: {image_filename}")
+        return
+    size = get_layout_image_size(image_paths.is_user_image(image_filename), cell.width_mult, cell.height_mult)
     
-    # 創建平滑的圓角矩形
-    return canvas.create_polygon(points, smooth=True, **kwargs)
-
-# 將方法添加到 Canvas 類
-tk.Canvas.create_rounded_rectangle = create_rounded_rectangle
+    # 圖片在背景解碼，失敗時保留文字
+    image_store.acquire(("layout", index), path, size, lambda img_tk: keyboard_view.set_image(index, img_tk),
+                        on_error=lambda e: print(f"創建按鍵圖片失敗 {cell.key_id}: {e}"))
 
 def show_tooltip(event, text):
     """顯示工具提示"""
@@ -401,233 +360,392 @@ def hide_tooltip():
     if 'tooltip' in globals():
         tooltip.destroy()
 
-def load_images():
-    """載入key_map.json中定義的所有圖片"""
-    # 使用全域的 key_map
+def sync_texture_atlas():
+    """在背景依目前的圖片路徑更新 atlas（只重新讀取有變動的檔案），不阻塞 Tk 執行緒"""
+    if texture_atlas is None:
+        return
     
-    # 從key_map載入所有圖片
-    for composite_key, key_info in key_map.items():
-        image_filename = key_info["png"]
+    def sync(paths):
+        """工作執行緒：更新 atlas 並寫入檔案"""
+        changed = texture_atlas.sync(paths)
+        # atlas 索引中已有內容雜湊，縮圖快取不必再讀取原圖
+        if thumbnail_cache is not None:
+            for path, entry in texture_atlas.entries.items():
+                thumbnail_cache.remember_digest(path, entry["mtime_ns"], entry["size"], entry["digest"])
+        return changed
+    
+    def on_synced(changed):
+        if changed:
+            print(f"atlas 已更新 {len(changed)} 張圖片")
+    
+    paths = [path for path in map(image_paths.resolve, key_map.pngs()) if path]
+    image_loader.run(sync, (paths,), on_synced, on_error=lambda e: print(f"更新 atlas 失敗: {e}"))
+
+def request_realtime_sprite(image_filename):
+    """排入背景產生一張圖片的即時按鍵版本（已快取或已排入時不做任何事）
+
+    按鍵時也會呼叫：這裡只查表並放入佇列，解析路徑與交給圖片儲存都在閒置時進行。
+    """
+    request = (image_filename, REALTIME_IMAGE_SIZE, REALTIME_BACKGROUND)
+    if request in realtime_sprites or request in realtime_sprite_requests:
+        return
+    if not queued_realtime_sprites:
+        root.after_idle(submit_realtime_sprite_requests)
+    realtime_sprite_requests.add(request)
+    queued_realtime_sprites.append(request)
+
+def submit_realtime_sprite_requests():
+    """把排入的即時按鍵圖片交給圖片儲存在背景產生"""
+    requests = list(queued_realtime_sprites)
+    queued_realtime_sprites.clear()
+    for request in requests:
+        image_filename, size, background = request
+        path = image_paths.resolve(image_filename)
+        if not path:
+            realtime_sprite_requests.discard(request)
+            continue
         
-        # 優先嘗試user資料夾
-        user_path = os.path.join(USER_DIR, image_filename)
-        default_path = os.path.join(DEFAULT_DIR, image_filename)
+        def on_loaded(img_tk, request=request):
+            realtime_sprite_requests.discard(request)
+            realtime_sprites.put(*request, img_tk)
+            if REALTIME_RENDERER == "history":
+                # 可見範圍內先以文字顯示的按鍵換上圖片
+                render_scheduler.mark_dirty()
         
-        if os.path.exists(user_path):
-            path = user_path
-            print(f"載入使用者圖片: {image_filename}")
-        elif os.path.exists(default_path):
-            path = default_path
-            print(f"載入預設圖片: {image_filename}")
-        else:
-            print(f"找不到圖片檔案: {image_filename}，跳過載入")
+        def on_error(e, request=request):
+            realtime_sprite_requests.discard(request)
+            print(f"產生即時按鍵圖片失敗 {request[0]}: {e}")
+        
+        image_store.acquire(("realtime", *request), path, size, on_loaded, on_error=on_error)
+
+def warm_realtime_sprites():
+    """在背景預先產生所有圖片的即時按鍵版本"""
+    for image_filename in key_map.pngs():
+        request_realtime_sprite(image_filename)
+
+def reload_images(image_filenames):
+    """在背景重新解碼變更的圖片，全部完成後在 Tk 執行緒一次換上"""
+    # 記下目前的即時按鍵尺寸與背景，換上時使用同一組設定
+    realtime_size, background = REALTIME_IMAGE_SIZE, REALTIME_BACKGROUND
+    jobs = []  # [(目標, 路徑, 尺寸, 縮放濾鏡)]，目標同時作為圖片儲存的 owner
+    missing = []  # 被刪除且沒有預設圖片可用的圖片
+    
+    for image_filename in image_filenames:
+        # 使用者圖片優先，被刪除時改回預設圖片
+        path = image_paths.resolve(image_filename)
+        if not path:
+            missing.append(image_filename)
             continue
+        is_user_image = image_paths.is_user_image(image_filename)
         
-        try:
-            img = Image.open(path).resize(IMAGE_SIZE)
-            # 使用圖片檔案名稱作為key_images的鍵
-            key_images[image_filename] = ImageTk.PhotoImage(img)
-            image_mtime[path] = os.path.getmtime(path)
-        except Exception as e:
-            print(f"載入圖片 {path} 失敗: {e}")
+        jobs.append((("realtime", image_filename, realtime_size, background), path, realtime_size,
+                     Image.Resampling.LANCZOS))
+        for index in layout_cells.get(image_filename, []):
+            cell = keyboard_view.cells[index]
+            size = get_layout_image_size(is_user_image, cell.width_mult, cell.height_mult)
+            jobs.append((("layout", index), path, size, Image.Resampling.LANCZOS))
     
-    print(f"總共載入 {len(key_images)} 張圖片")
-
-def reload_if_changed():
-    """檢查圖片是否變更，有變就重新載入"""
-    updated = False
-    # 使用全域的 key_map
+    if missing:
+        drop_missing_images(missing)
+    if not jobs:
+        return
     
-    for composite_key, key_info in key_map.items():
-        image_filename = key_info["png"]
-        user_path = os.path.join(USER_DIR, image_filename)
-        default_path = os.path.join(DEFAULT_DIR, image_filename)
-        
-        # 檢查路徑是否存在
-        if os.path.exists(user_path):
-            path = user_path
-        elif os.path.exists(default_path):
-            path = default_path
+    results = {}
+    remaining = [len(jobs)]
+    
+    def finish(target, img_tk):
+        if img_tk is not None:
+            results[target] = img_tk
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            install_reloaded_images(results, realtime_size, background)
+    
+    for target, path, size, resample in jobs:
+        image_store.acquire(target, path, size, lambda img_tk, target=target: finish(target, img_tk),
+                            resample=resample,
+                            on_error=lambda e, target=target, path=path: (
+                                print(f"重新載入圖片失敗 {path}: {e}"), finish(target, None)))
+
+def drop_missing_images(image_filenames):
+    """圖片被刪除且沒有預設圖片可用：釋放舊圖片，改回顯示按鍵名稱"""
+    missing = set(image_filenames)
+    for image_filename in missing:
+        for _, size, background in realtime_sprites.invalidate(image_filename):
+            image_store.release(("realtime", image_filename, size, background))
+        # 尚未產生完成的即時按鍵圖片也一併取消
+        image_store.release(("realtime", image_filename, REALTIME_IMAGE_SIZE, REALTIME_BACKGROUND))
+        for index in layout_cells.get(image_filename, []):
+            image_store.release(("layout", index))
+            keyboard_view.set_image(index, None)
+        print(f"圖片已刪除: {image_filename}")
+    chord_sprites.clear()
+    
+    if REALTIME_RENDERER == "history":
+        # 可見範圍在重繪時取不到圖片，自動改為文字
+        render_scheduler.mark_dirty()
+        return
+    
+    def uses_missing(slot):
+        members = (slot,) if slot < len(key_map) else chords[slot - len(key_map)]
+        return any(key_map.records[member].png in missing for member in members)
+    
+    # strip_keys 的最後幾筆是尚未繪製的 pending_keys
+    shown = len(strip_keys) - len(pending_keys)
+    for age, (_, slot) in enumerate(strip_keys):
+        if not uses_missing(slot):
+            continue
+        if age < shown:
+            key_strip.set_text(age, tile_name(slot))
         else:
-            continue  # 跳過不存在的圖片
-        
-        try:
-            mtime = os.path.getmtime(path)
-            if path not in image_mtime or mtime != image_mtime[path]:
-                img = Image.open(path).resize(IMAGE_SIZE)
-                key_images[image_filename] = ImageTk.PhotoImage(img)
-                image_mtime[path] = mtime
-                updated = True
-                print(f"重新載入圖片: {image_filename}")
-        except Exception as e:
-            print(f"重新載入圖片失敗: {e}")
+            pending_keys[age - shown] = (None, tile_name(slot))
+
+def install_reloaded_images(results, realtime_size, background):
+    """一次換上所有重新載入的圖片（在 Tk 執行緒執行，中間不會處理按鍵事件）"""
+    for (kind, target, *_), img_tk in results.items():
+        if kind == "realtime":
+            old_sprite = realtime_sprites.get(target, realtime_size, background)
+            # 其他尺寸與背景的舊版本不再使用，一併釋放
+            for _, size, old_background in realtime_sprites.invalidate(target):
+                if (size, old_background) != (realtime_size, background):
+                    image_store.release(("realtime", target, size, old_background))
+            realtime_sprites.put(target, realtime_size, background, img_tk)
+            # 組合鍵圖片之後依新圖片重新合成
+            chord_sprites.clear()
+            # 正在顯示或等待繪製的按鍵也換成新圖片
+            if old_sprite is not None:
+                key_strip.replace_image(old_sprite, img_tk)
+                pending_keys[:] = [(img_tk if sprite is old_sprite else sprite, name)
+                                   for sprite, name in pending_keys]
+        elif kind == "layout":
+            keyboard_view.set_image(target, img_tk)
+
+def on_image_files_changed(changes):
+    """圖片目錄有變更時，只重新載入 key_map 中用到且有變動的圖片"""
+    # 先更新路徑解析結果（例如新增了使用者圖片）
+    image_paths.update(changes)
+    # 變動的檔案之後重新計算內容雜湊
+    image_store.forget(os.path.join(directory, name) for directory, name in changes)
+    # atlas 在背景更新；更新完成前，變動的圖片與 atlas 索引不符，會直接讀取原檔
+    sync_texture_atlas()
+    changed_names = {name for _, name in changes}
+    reload_images([image_filename for image_filename in key_map.pngs() if image_filename in changed_names])
+
+def get_realtime_colors():
+    """取得即時按鍵區域的背景與文字顏色"""
+    if REALTIME_BACKGROUND == "blue":
+        return '#0000FF', 'white'  # 藍幕上使用白色文字
+    elif REALTIME_BACKGROUND == "green":
+        return '#00FF00', 'black'
+    else:  # default
+        return root.cget('bg'), 'black'
+
+def tile_sprite(slot, step=0):
+    """按鍵或組合鍵槽位的即時按鍵圖片（step 為淡出畫格）；尚未產生時在背景產生並回傳 None"""
+    if slot >= len(key_map):
+        return chord_sprite(chords[slot - len(key_map)], step)
+    image_filename = key_map.records[slot].png
+    img_tk = realtime_sprites.get_faded(image_filename, REALTIME_IMAGE_SIZE, REALTIME_BACKGROUND, step)
+    if img_tk is None:
+        request_realtime_sprite(image_filename)
+    return img_tk
+
+def tile_name(slot):
+    """按鍵或組合鍵槽位的名稱（沒有圖片時顯示）"""
+    if slot >= len(key_map):
+        return "+".join(key_map.records[member].name for member in chords[slot - len(key_map)])
+    return key_map.records[slot].name
+
+def chord_sprite(members, step=0):
+    """組合鍵的圖片：第一次需要時由各按鍵的即時按鍵圖片合成，之後從組合鍵快取取得"""
+    chord_key = tuple(key_map.records[member].png for member in members)
+    frame = chord_sprites.get_faded(chord_key, REALTIME_IMAGE_SIZE, REALTIME_BACKGROUND, step)
+    if frame is not None:
+        return frame
+    sprites = [tile_sprite(member) for member in members]
+    if any(sprite is None for sprite in sprites):
+        return None  # 等各按鍵圖片產生後重繪時再合成
+    chord_sprites.put(chord_key, REALTIME_IMAGE_SIZE, REALTIME_BACKGROUND,
+                      compose_sprites(sprites, REALTIME_IMAGE_SIZE))
+    return chord_sprites.get_faded(chord_key, REALTIME_IMAGE_SIZE, REALTIME_BACKGROUND, step)
+
+def chord_tile_slot(members):
+    """組合鍵的顯示用槽位（第一次出現時編號）"""
+    tile_slot = chord_tile_slots.get(members)
+    if tile_slot is None:
+        tile_slot = chord_tile_slots[members] = len(key_map) + len(chords)
+        chords.append(members)
+    return tile_slot
+
+def history_sprite(slot, pressed_at):
+    """按鍵紀錄中某個槽位的即時按鍵圖片與名稱"""
+    return tile_sprite(slot, fade_step(pressed_at, time.monotonic())), tile_name(slot)
+
+def fade_step(pressed_at, now):
+    """按鍵目前應顯示的淡出畫格（0 為完整圖片）"""
+    if not KEY_EXPIRE_MS or not KEY_FADE_STEPS:
+        return 0
+    fade_ms = (now - pressed_at) * 1000 - (KEY_EXPIRE_MS - KEY_FADE_MS)
+    if fade_ms < 0:
+        return 0
+    return min(KEY_FADE_STEPS, int(fade_ms * KEY_FADE_STEPS // max(1, KEY_FADE_MS)) + 1)
+
+def schedule_key_expiry():
+    """為剛按下的按鍵排程各個淡出畫格與消失的時間點"""
+    global expiry_scheduled_tick
+    if not KEY_EXPIRE_MS:
+        return
+    # 同一個刻度內按下的按鍵，淡出與消失的時間點也相同，只需排程一次
+    tick = expiry_wheel.now_tick()
+    if tick == expiry_scheduled_tick:
+        return
+    expiry_scheduled_tick = tick
+    # 多等一個刻度，確保這個刻度內較晚按下的按鍵在計時到期時也已到達對應時間
+    margin = expiry_wheel.tick_ms
+    fade_start = KEY_EXPIRE_MS - KEY_FADE_MS
+    if KEY_FADE_STEPS:
+        for step in range(KEY_FADE_STEPS):
+            expiry_wheel.schedule(fade_start + KEY_FADE_MS * step // KEY_FADE_STEPS + margin, request_key_expiry)
+    expiry_wheel.schedule(KEY_EXPIRE_MS + margin, request_key_expiry)
+
+def request_key_expiry():
+    """計時到期：在下一個畫格更新淡出與消失（與其他變更一起繪製，不超過最高 FPS）"""
+    global expiry_due
+    expiry_due = True
+    render_scheduler.mark_dirty()
+
+def apply_key_expiry():
+    """依目前時間移除過期的按鍵並更新淡出畫格（所有按鍵的延遲相同，過期的一定在最前面）"""
+    global history_expired, realtime_key_count, expiry_due
+    expiry_due = False
+    now = time.monotonic()
+    expire_at = now - KEY_EXPIRE_MS / 1000
     
-    root.after(1000, reload_if_changed)  # 每秒檢查一次
-
-def _rearrange_keys():
-    """重新排列所有按鍵"""
-    if not pressed_keys:
+    if REALTIME_RENDERER == "history":
+        while history_expired < len(key_history) and key_history.times[history_expired] <= expire_at:
+            history_expired += 1
+        # 淡出畫格由 history_sprite 依按下時間決定
+        key_strip.expire_before(history_expired)
         return
     
-    # 獲取所有按鍵標籤和對應的鍵名
-    items = list(pressed_keys.items())
+    expired = 0
+    while strip_keys and strip_keys[0][0] <= expire_at:
+        strip_keys.popleft()
+        expired += 1
+    if expired:
+        # 先隱藏所有過期的按鍵，其餘按鍵在這個畫格結束前一次前移
+        key_strip.evict_oldest(expired)
+        realtime_key_count -= expired
+    for age, (pressed_at, slot) in enumerate(strip_keys):
+        step = fade_step(pressed_at, now)
+        if not step:
+            break
+        frame = tile_sprite(slot, step)
+        if frame is not None:
+            key_strip.set_image(age, frame)
+
+def render_realtime():
+    """把累積的變更一次套用到即時按鍵顯示區"""
+    global pending_clear
     
-    # 清空pressed_keys字典
-    pressed_keys.clear()
+    if pending_clear:
+        key_strip.clear()
+        pending_clear = False
     
-    # 重新排列（使用 config 中的設定）
-    max_keys_per_row = MAX_KEYS_PER_ROW
-    max_rows = MAX_ROWS
+    if REALTIME_RENDERER == "history":
+        if expiry_due:
+            apply_key_expiry()
+        key_strip.refresh()
+        return
     
-    for i, (unique_id, label) in enumerate(items):
-        if i >= max_keys_per_row * max_rows:  # 超過限制的按鍵不顯示
-            label.destroy()
-            continue
-            
-        row = i // max_keys_per_row
-        col = i % max_keys_per_row
-        label.grid(row=row, column=col, padx=2, pady=2, sticky='nw')
-        pressed_keys[unique_id] = label
+    if pending_keys:
+        bg, fg = get_realtime_colors()
+        for img_tk, key_name in pending_keys:
+            # 快取中沒有圖片時降級為文字
+            key_strip.push(image=img_tk, text=key_name, bg=bg, fg=fg)
+        pending_keys.clear()
+    
+    # 待繪製的按鍵已放入顯示槽，順序與 strip_keys 一致
+    if expiry_due:
+        apply_key_expiry()
+    key_strip.reflow()
+
+def highlight_layout_key(slot, pressed):
+    """在鍵盤配置分頁標示或取消標示按住的按鍵（分頁尚未建立時不做任何事）"""
+    if keyboard_view is None:
+        return
+    for index in layout_slot_cells[slot]:
+        keyboard_view.set_highlight(index, pressed)
+
+def push_realtime_tile(slot, pressed=()):
+    """在即時按鍵區加入一個按鍵或組合鍵；pressed 為自動清空後仍要標記為按下的按鍵槽位"""
+    global realtime_key_count
+    if REALTIME_RENDERER == "history":
+        # 只記錄槽位與時間；圖片由 HistoryKeyStrip 繪製可見的列時才取得
+        key_history.append(slot)
+        schedule_key_expiry()
+        render_scheduler.mark_dirty()
+        return
+    
+    # 從快取取得預先縮放好的圖片（不讀取磁碟）；已被淘汰或尚未產生時這次先顯示文字
+    img_tk = tile_sprite(slot)
+    
+    # 顯示槽已滿時清空所有按鍵，再從第一格開始排列
+    if realtime_key_count >= key_strip.capacity:
+        clear_all_keys()
+        for pressed_slot in pressed:
+            root.currently_pressed.press(pressed_slot)
+    
+    # 只記錄變更，實際繪製由 render_realtime 在下一個畫格進行
+    pending_keys.append((img_tk, tile_name(slot)))
+    strip_keys.append((time.monotonic(), slot))
+    realtime_key_count += 1
+    schedule_key_expiry()
+    render_scheduler.mark_dirty()
 
 def show_key(event):
     """顯示按下的按鍵圖片"""
-    # 使用複合鍵值來區分數字鍵盤和主鍵盤的按鍵
-    # 格式: "scan_code:is_keypad" (例如: "55:False" 表示主鍵盤的按鍵)
-    keycode = str(event.scan_code)
-    is_keypad = event.is_keypad
-    composite_key = f"{keycode}:{is_keypad}"
+    # 使用 (scan_code, is_keypad) 查表來區分數字鍵盤和主鍵盤的按鍵
+    key_record = key_map.lookup(event.scan_code, event.is_keypad)
     
-    # 首先嘗試使用複合鍵值查找
-    if composite_key in key_map:
-        key_info = key_map[composite_key]
-        key_name = key_info["name"]
-        image_filename = key_info["png"]
-        
-        # 檢查該按鍵是否已經被按下（防止長按時重複累積）
-        if key_name in root.currently_pressed:
-            return  # 如果按鍵已經被按下，不重複處理
+    if key_record is not None:
+        # 鍵盤配置分頁即時標示按住的按鍵
+        highlight_layout_key(key_record.slot, True)
         
-        # 標記按鍵為已按下
-        root.currently_pressed.add(key_name)
+        # 標記按鍵為已按下；已經被按下時不重複處理（防止長按時重複累積）
+        if not root.currently_pressed.press(key_record.slot):
+            return
         
-        # 檢查圖片是否已載入
-        if image_filename in key_images:
-            # 在即時按鍵分頁中顯示圖片
-            if hasattr(root, 'key_display_frame'):
-                # 檢查圖片來源（user 或 default 資料夾）
-                user_path = os.path.join(USER_DIR, image_filename)
-                is_user_image = os.path.exists(user_path)
-                
-                if is_user_image:
-                    # 使用者圖片：使用可配置的大小
-                    try:
-                        img = Image.open(user_path).resize(REALTIME_IMAGE_SIZE, Image.Resampling.LANCZOS)
-                        img_tk = ImageTk.PhotoImage(img)
-                        # 根據背景設定設定標籤背景顏色
-                        if REALTIME_BACKGROUND == "blue":
-                            key_label = tk.Label(root.key_display_frame, image=img_tk, borderwidth=0, bg='#0000FF')
-                        elif REALTIME_BACKGROUND == "green":
-                            key_label = tk.Label(root.key_display_frame, image=img_tk, borderwidth=0, bg='#00FF00')
-                        else:  # default
-                            default_bg = root.cget('bg')
-                            key_label = tk.Label(root.key_display_frame, image=img_tk, borderwidth=0, bg=default_bg)
-                        # 保存圖片引用以防止垃圾回收
-                        key_label.image = img_tk
-                    except Exception as e:
-                        print(f"創建使用者即時按鍵圖片失敗 {key_name}: {e}")
-                        # 降級為文字標籤
-                        if REALTIME_BACKGROUND == "blue":
-                            key_label = tk.Label(root.key_display_frame, text=key_name, borderwidth=0, font=('Arial', 10), bg='#0000FF', fg='white')
-                        elif REALTIME_BACKGROUND == "green":
-                            key_label = tk.Label(root.key_display_frame, text=key_name, borderwidth=0, font=('Arial', 10), bg='#00FF00', fg='black')
-                        else:  # default
-                            default_bg = root.cget('bg')
-                            key_label = tk.Label(root.key_display_frame, text=key_name, borderwidth=0, font=('Arial', 10), bg=default_bg)
-                else:
-                    # 預設圖片：使用可配置的大小
-                    try:
-                        img = Image.open(os.path.join(DEFAULT_DIR, image_filename)).resize(REALTIME_IMAGE_SIZE, Image.Resampling.LANCZOS)
-                        img_tk = ImageTk.PhotoImage(img)
-                        # 根據背景設定設定標籤背景顏色
-                        if REALTIME_BACKGROUND == "blue":
-                            key_label = tk.Label(root.key_display_frame, image=img_tk, borderwidth=0, bg='#0000FF')
-                        elif REALTIME_BACKGROUND == "green":
-                            key_label = tk.Label(root.key_display_frame, image=img_tk, borderwidth=0, bg='#00FF00')
-                        else:  # default
-                            default_bg = root.cget('bg')
-                            key_label = tk.Label(root.key_display_frame, image=img_tk, borderwidth=0, bg=default_bg)
-                        # 保存圖片引用以防止垃圾回收
-                        key_label.image = img_tk
-                    except Exception as e:
-                        print(f"創建預設即時按鍵圖片失敗 {key_name}: {e}")
-                        # 降級為文字標籤
-                        if REALTIME_BACKGROUND == "blue":
-                            key_label = tk.Label(root.key_display_frame, text=key_name, borderwidth=0, font=('Arial', 10), bg='#0000FF', fg='white')
-                        elif REALTIME_BACKGROUND == "green":
-                            key_label = tk.Label(root.key_display_frame, text=key_name, borderwidth=0, font=('Arial', 10), bg='#00FF00', fg='black')
-                        else:  # default
-                            default_bg = root.cget('bg')
-                            key_label = tk.Label(root.key_display_frame, text=key_name, borderwidth=0, font=('Arial', 10), bg=default_bg)
-                
-                # 計算位置（依序排列，限制在可見範圍內）
-                keys_count = len(pressed_keys)
-                max_keys_per_row = MAX_KEYS_PER_ROW  # 使用 config 中的設定
-                max_rows = MAX_ROWS  # 使用 config 中的設定
-                max_total_keys = max_keys_per_row * max_rows+1  # 總共按鍵數量
-                
-                if keys_count < max_total_keys:  # 限制總按鍵數量為 23×5 = 115 個
-                    row = keys_count // max_keys_per_row
-                    col = keys_count % max_keys_per_row
-                    
-                    # 使用grid佈局來排列按鍵
-                    key_label.grid(row=row, column=col, padx=2, pady=2, sticky='nw')
-                    
-                    # 保存引用（使用唯一標識符）
-                    unique_id = f"{key_name}_{keys_count}"
-                    pressed_keys[unique_id] = key_label
-                    
-                    # 檢查是否剛好達到115個按鍵
-                    if len(pressed_keys) == max_total_keys:
-                        # 當達到115個按鍵時，清空所有按鍵
-                        clear_all_keys()
-                else:
-                    # 如果超過限制，移除最早的按鍵
-                    oldest_key = list(pressed_keys.keys())[0]
-                    oldest_label = pressed_keys[oldest_key]
-                    oldest_label.destroy()
-                    del pressed_keys[oldest_key]
-                    
-                    # 重新排列剩餘的按鍵
-                    _rearrange_keys()
-                    
-                    # 添加新按鍵到最後位置
-                    keys_count = len(pressed_keys)
-                    row = keys_count // max_keys_per_row
-                    col = keys_count % max_keys_per_row
-                    key_label.grid(row=row, column=col, padx=2, pady=2, sticky='nw')
-                    
-                    # 保存引用（使用唯一標識符）
-                    unique_id = f"{key_name}_{keys_count}"
-                    pressed_keys[unique_id] = key_label
+        # 在即時按鍵分頁中顯示（圖片尚未載入或載入失敗時，由即時區顯示文字替代）
+        if hasattr(root, 'key_display_frame'):
+            if CHORD_MODE and key_record.slot in chord_modifier_slots:
+                # 修飾鍵先不顯示：按下其他按鍵時合併成組合鍵，沒有組合時放開才單獨顯示
+                held_modifiers.add(key_record.slot)
                 return
-            else:
-                print(f"圖片 {image_filename} 未載入")
-        else:
-            print(f"按鍵 {key_name} 在key_map中未定義")
+            if CHORD_MODE and held_modifiers:
+                members = tuple(slot for slot in chord_modifier_slots if slot in held_modifiers)
+                members += (key_record.slot,)
+                used_modifiers.update(held_modifiers)
+                push_realtime_tile(chord_tile_slot(members), pressed=members)
+                return
+            push_realtime_tile(key_record.slot, pressed=(key_record.slot,))
     else:
-        print(f"按鍵 keycode {keycode} 未定義對應關係")
+        print(f"按鍵 keycode {event.scan_code} 未定義對應關係")
 
 def clear_all_keys():
     """清空所有顯示的按鍵圖片"""
-    global pressed_keys
-    
-    # 銷毀所有按鍵標籤
-    for label in pressed_keys.values():
-        if label and hasattr(label, 'destroy'):
-            label.destroy()
+    global pending_clear, realtime_key_count, history_expired, expiry_scheduled_tick
     
-    # 清空按鍵字典
-    pressed_keys.clear()
+    # 捨棄尚未繪製的按鍵，並在下一個畫格隱藏所有顯示槽（不銷毀元件）
+    pending_keys.clear()
+    strip_keys.clear()
+    key_history.clear()
+    history_expired = 0
+    expiry_wheel.clear()
+    expiry_scheduled_tick = None
+    pending_clear = True
+    realtime_key_count = 0
+    if render_scheduler is not None:
+        render_scheduler.mark_dirty()
     
     # 清空當前按下的按鍵集合
     if hasattr(root, 'currently_pressed'):
@@ -637,52 +755,31 @@ def clear_all_keys():
 
 def hide_key(event):
     """隱藏釋放的按鍵圖片"""
-    # 使用複合鍵值來區分數字鍵盤和主鍵盤的按鍵
-    keycode = str(event.scan_code)
-    is_keypad = event.is_keypad
-    composite_key = f"{keycode}:{is_keypad}"
+    # 使用 (scan_code, is_keypad) 查表來區分數字鍵盤和主鍵盤的按鍵
+    key_record = key_map.lookup(event.scan_code, event.is_keypad)
     
-    # 使用複合鍵值查找
-    if composite_key in key_map:
-        key_info = key_map[composite_key]
-        key_name = key_info["name"]
-        
+    if key_record is not None:
         # 從當前按下的集合中移除（允許該按鍵再次被按下）
-        if key_name in root.currently_pressed:
-            root.currently_pressed.remove(key_name)
+        root.currently_pressed.release(key_record.slot)
+        highlight_layout_key(key_record.slot, False)
+        
+        # 沒有組成組合鍵的修飾鍵在放開時單獨顯示
+        if key_record.slot in held_modifiers:
+            held_modifiers.discard(key_record.slot)
+            if key_record.slot in used_modifiers:
+                used_modifiers.discard(key_record.slot)
+            else:
+                push_realtime_tile(key_record.slot)
     
     # 注意：我們不應該移除圖片，只移除currently_pressed標記
     # 這樣圖片就能累積顯示
 
 # 鍵盤按鍵配置
 # 載入圖片（在設定載入之後）
-load_images()
-reload_if_changed()  # 啟動背景檢查
-
-# 主鍵區（Esc~F12）
-main_keys_row1 = ["1", "59", "60", "61", "62", "63", "64", "65", "66", "67", "68", "87", "88"]
-main_keys_row2 = ["41", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14"]
-main_keys_row3 = ["15", "16", "17", "18", "19", "20", "21", "22", "23", "24", "25", "26", "27", "43"]
-# CapsLock與Enter佔1.5鍵位（columnspan=2），其餘正常
-main_keys_row4 = ["58", "30", "31", "32", "33", "34", "35", "36", "37", "38", "39", "40", "28"]
-main_keys_row5 = ["42", "", "44", "45", "46", "47", "48", "49", "50", "51", "52", "53", "54"]
-main_keys_row6 = ["29", "91", "56", "57", "", "", "", "", "", "", "100", "92", "93", "97"]
-
-# 次鍵區
-sub_keys_row1 = ["99", "70", "119"]
-sub_keys_row2 = ["110", "101", "103"]
-sub_keys_row3 = ["111", "107", "109"]
-sub_keys_row4 = ["", "", ""]
-sub_keys_row5 = ["", "102", ""]
-sub_keys_row6 = ["104", "108", "106"]
-
-# 數字鍵區
-num_keys_row1 = ["", "", "", ""]
-num_keys_row2 = ["69", "98", "55", "74"]
-num_keys_row3 = ["71", "72", "73", "78"]
-num_keys_row4 = ["75", "76", "77", ""]
-num_keys_row5 = ["79", "80", "81", "96"]
-num_keys_row6 = ["82", "83", "52", ""]
+sync_texture_atlas()
+warm_realtime_sprites()
+# 監看圖片目錄，有新增、修改或刪除時自動重新載入
+image_watcher = DirectoryWatcher(root, [USER_DIR, DEFAULT_DIR], on_image_files_changed)
 
 # 創建標籤頁容器
 notebook = ttk.Notebook(root)
@@ -713,12 +810,6 @@ keys_canvas = tk.Canvas(realtime_frame)
 keys_scrollbar = ttk.Scrollbar(realtime_frame, orient="vertical", command=keys_canvas.yview)
 keys_scrollable_frame = tk.Frame(keys_canvas)
 
-keys_scrollable_frame.bind(
-    "<Configure>",
-    lambda e: keys_canvas.configure(scrollregion=keys_canvas.bbox("all"))
-)
-
-keys_canvas.create_window((0, 0), window=keys_scrollable_frame, anchor="nw")
 keys_canvas.configure(yscrollcommand=keys_scrollbar.set)
 
 # 按鍵顯示區域（整個區塊都是顯示範圍）
@@ -735,6 +826,26 @@ else:  # default - 透明（使用系統預設背景）
     default_bg = root.cget('bg')
     key_display_frame.configure(bg=default_bg)
 
+# 預先建立即時按鍵顯示槽
+if REALTIME_RENDERER == "history":
+    # 整個工作階段的按鍵紀錄直接畫在 keys_canvas 上，只繪製可見的列
+    key_strip = HistoryKeyStrip(keys_canvas, key_history, MAX_KEYS_PER_ROW, REALTIME_IMAGE_SIZE,
+                                history_sprite, scrollbar=keys_scrollbar)
+elif REALTIME_RENDERER == "canvas":
+    # 單一 Canvas：按鍵直接畫在 keys_canvas 上，捲動範圍固定
+    key_strip = CanvasKeyStrip(keys_canvas, MAX_KEYS_PER_ROW, MAX_ROWS, key_display_frame.cget('bg'), REALTIME_IMAGE_SIZE)
+else:
+    # 每個按鍵一個 Label，放在可捲動的框架中
+    keys_scrollable_frame.bind(
+        "<Configure>",
+        lambda e: keys_canvas.configure(scrollregion=keys_canvas.bbox("all"))
+    )
+    keys_canvas.create_window((0, 0), window=keys_scrollable_frame, anchor="nw")
+    key_strip = LabelKeyStrip(key_display_frame, MAX_KEYS_PER_ROW, MAX_ROWS, key_display_frame.cget('bg'))
+
+# 重繪排程：同一畫格內的所有變更合併為一次重繪
+render_scheduler = RenderScheduler(root, REALTIME_FPS, render_realtime)
+
 # 配置滾輪功能
 keys_canvas.pack(side="left", fill="both", expand=True)
 keys_scrollbar.pack(side="right", fill="y")
@@ -756,8 +867,8 @@ root.key_display_frame = key_display_frame
 root.keys_canvas = keys_canvas
 root.keys_scrollable_frame = keys_scrollable_frame
 
-# 用於追蹤當前按下的按鍵（防止按住時重複累積）
-root.currently_pressed = set()
+# 用於追蹤當前按下的按鍵（防止按住時重複累積），以按鍵槽位為索引
+root.currently_pressed = PressedKeys(len(key_map))
 
 # 應用即時按鍵區域的背景設定
 def apply_realtime_background():
@@ -792,344 +903,109 @@ def apply_realtime_background():
 
 def update_existing_keys_background():
     """更新現有按鍵的背景顏色以匹配當前背景設定"""
-    global pressed_keys
-    
-    for unique_id, label in pressed_keys.items():
-        if label and hasattr(label, 'configure'):
-            if REALTIME_BACKGROUND == "blue":
-                label.configure(bg='#0000FF')
-                if hasattr(label, 'cget') and label.cget('text'):  # 如果是文字標籤
-                    label.configure(fg='white')  # 藍幕上使用白色文字
-            elif REALTIME_BACKGROUND == "green":
-                label.configure(bg='#00FF00')
-                if hasattr(label, 'cget') and label.cget('text'):  # 如果是文字標籤
-                    label.configure(fg='black')  # 綠幕上使用黑色文字
-            else:  # default
-                default_bg = root.cget('bg')
-                label.configure(bg=default_bg)
-                if hasattr(label, 'cget') and label.cget('text'):  # 如果是文字標籤
-                    label.configure(fg='black')  # 預設背景上使用黑色文字
+    if key_strip is not None:
+        bg, fg = get_realtime_colors()
+        key_strip.set_colors(bg, fg)
 
 # 初始化時應用背景設定
 apply_realtime_background()
 
-# 分頁二：鍵盤配置標籤頁內容
-keyboard_frame = tk.Frame(keyboard_tab)
-keyboard_frame.pack(fill='both', expand=True, padx=10, pady=10)
-
-# 在鍵盤配置上方加入空白區域
-top_spacer = tk.Frame(keyboard_frame, height=20)
-top_spacer.pack(fill='x')
-
-main_frame = tk.Frame(keyboard_frame)
-sub_frame = tk.Frame(keyboard_frame)
-num_frame = tk.Frame(keyboard_frame)
-
-main_frame.pack(side='left', padx=10, pady=10)
-sub_frame.pack(side='left', padx=10, pady=10)
-num_frame.pack(side='left', padx=10, pady=10)
-
-# 主鍵區前3列
-main_rows = [main_keys_row1, main_keys_row2, main_keys_row3]
-for row_idx, row in enumerate(main_rows):
-    for col_idx, key_id in enumerate(row):
-        label = create_key_image_label(main_frame, key_id)
-        label.grid(row=row_idx, column=col_idx, padx=2, pady=2)
-
-# 主鍵區第4列（CapsLock/Enter佔1.5格，但使用標準佈局）
-row_idx = 3
-col_idx = 0
-while col_idx < len(main_keys_row4):
-    key_id = main_keys_row4[col_idx]
-    if key_id == "28":  # Enter
-        label = create_key_image_label(main_frame, key_id, width_mult=2)
-        label.grid(row=row_idx, column=col_idx, padx=2, pady=2, columnspan=2)
-        col_idx += 2
-    else:
-        label = create_key_image_label(main_frame, key_id)
-        label.grid(row=row_idx, column=col_idx, padx=2, pady=2)
-        col_idx += 1
-
-# 主鍵區第5列（Shift佔兩格，Z往右移一格）
-row_idx = 4
-col_idx = 0
-while col_idx < len(main_keys_row5):
-    key_id = main_keys_row5[col_idx]
-    if key_id == "42" and col_idx == 0:  # 第一個 Shift
-        label = create_key_image_label(main_frame, key_id, width_mult=2)
-        label.grid(row=row_idx, column=col_idx, padx=2, pady=2, columnspan=2)
-        col_idx += 2
-    elif key_id == "54" and col_idx == len(main_keys_row5)-1:  # 最後一個 Shift
-        label = create_key_image_label(main_frame, key_id, width_mult=2)
-        label.grid(row=row_idx, column=col_idx, padx=2, pady=2, columnspan=2)
-        col_idx += 2
-    elif key_id == '':
-        col_idx += 1
-    else:
-        label = create_key_image_label(main_frame, key_id)
-        label.grid(row=row_idx, column=col_idx, padx=2, pady=2)
-        col_idx += 1
-
-# 主鍵區第6列（Space佔7格）
-row_idx = 5
-col_idx = 0
-while col_idx < len(main_keys_row6):
-    key_id = main_keys_row6[col_idx]
-    if key_id == "57":  # Space
-        label = create_key_image_label(main_frame, key_id, width_mult=7)
-        label.grid(row=row_idx, column=col_idx, padx=2, pady=2, columnspan=7)
-        col_idx += 7
-    elif key_id == '':
-        col_idx += 1
-    else:
-        label = create_key_image_label(main_frame, key_id)
-        label.grid(row=row_idx, column=col_idx, padx=2, pady=2)
-        col_idx += 1
-
-# 次鍵區按鍵（六列）
-sub_rows = [sub_keys_row1, sub_keys_row2, sub_keys_row3, sub_keys_row4, sub_keys_row5, sub_keys_row6]
-for row_idx, row in enumerate(sub_rows):
-    for col_idx, key_id in enumerate(row):
-        label = create_key_image_label(sub_frame, key_id)
-        label.grid(row=row_idx, column=col_idx, padx=2, pady=2)
-
-# 數字鍵區按鍵（六列，+與Enter合併，0佔兩格，跳過被合併格）
-num_rows = [num_keys_row1, num_keys_row2, num_keys_row3, num_keys_row4, num_keys_row5, num_keys_row6]
-skip_cells = set()  # (row, col) 需跳過的格子
-for row_idx, row in enumerate(num_rows):
-    col_idx = 0
-    while col_idx < len(row):
-        key_id = row[col_idx]
-        # 跳過被合併的格子
-        if (row_idx, col_idx) in skip_cells:
-            col_idx += 1
-            continue
-        # + 按鍵合併第三、四列
-        if key_id == "78" and row_idx == 2:  # NumAdd
-            label = create_key_image_label(num_frame, key_id, height_mult=2)
-            label.grid(row=2, column=col_idx, rowspan=2, padx=2, pady=2)
-            skip_cells.add((3, col_idx))
-            col_idx += 1
-        # Enter合併第五、六列
-        elif key_id == "96" and row_idx == 4:  # NumEnter
-            label = create_key_image_label(num_frame, key_id, height_mult=2)
-            label.grid(row=4, column=col_idx, rowspan=2, padx=2, pady=2)
-            skip_cells.add((5, col_idx))
-            col_idx += 1
-        # 0佔兩格
-        elif key_id == "82" and row_idx == 5 and col_idx == 0:  # Num0
-            label = create_key_image_label(num_frame, key_id, width_mult=2)
-            label.grid(row=row_idx, column=col_idx, padx=2, pady=2, columnspan=2)
-            skip_cells.add((row_idx, 1))
-            col_idx += 2
-        elif key_id == '' or (key_id == "78" and row_idx == 3) or (key_id == "96" and row_idx == 5):
-            label = create_key_image_label(num_frame, key_id)
-            label.grid(row=row_idx, column=col_idx, padx=2, pady=2)
-            col_idx += 1
-        else:
-            label = create_key_image_label(num_frame, key_id)
-            label.grid(row=row_idx, column=col_idx, padx=2, pady=2)
-            col_idx += 1
+# 分頁二：鍵盤配置標籤頁內容（第一次切換到該分頁時才建立）
+def build_keyboard_tab():
+    """建立鍵盤配置分頁的內容（整個鍵盤畫在同一個 Canvas 上）"""
+    global keyboard_view
+    keyboard_frame = tk.Frame(keyboard_tab)
+    keyboard_frame.pack(fill='both', expand=True, padx=10, pady=10)
+    
+    # 按鍵位置來自編譯好的鍵盤配置（主鍵區、次鍵區、數字鍵區由左到右排列）
+    cells = keyboard_layout.cells
+    
+    # 圖片載入前先顯示按鍵名稱
+    labels = []
+    for cell in cells:
+        key_info = key_map.by_key_id(cell.key_id)
+        labels.append(key_info.name if key_info else cell.key_id)
+    
+    def on_key_enter(event, index):
+        """設定工具提示顯示按鍵名稱"""
+        if index is not None:
+            show_tooltip(event, labels[index])
+    
+    keyboard_view = KeyboardCanvas(keyboard_frame, cells, labels, on_enter=on_key_enter, on_leave=hide_tooltip)
+    keyboard_view.pack(side='left', anchor='n')
+    
+    # 預先算好每個按鍵槽位對應的畫面按鍵，按鍵事件只需查表
+    layout_slot_cells[:] = [tuple(keyboard_layout.cells_by_key.get(record.key_id, ())) for record in key_map]
+    for slot in root.currently_pressed.slots():
+        highlight_layout_key(slot, True)
+    
+    for index in range(len(cells)):
+        load_layout_image(index)
 
 # 分頁三：按鍵列表標籤頁內容
-# 這裡可以重新設計按鍵列表的佈局
+# 使用 Treeview 顯示（只繪製看得到的列），按鍵數量很多時也能即時捲動與篩選
 
-def get_key_map_info(key_id):
-    """根據按鍵 ID 查找對應的 key_map 資訊"""
-    if not key_id or key_id == '':
-        return "空白", ""
+def build_keys_list_tab():
+    """建立按鍵列表分頁的內容"""
+    keys_list_frame = tk.Frame(keys_list_tab)
+    keys_list_frame.pack(fill='both', expand=True, padx=10, pady=10)
     
-    # 在 key_map 中查找對應的 key_id
-    for composite_key, key_info in key_map.items():
-        if key_info["key_id"] == key_id:
-            return key_info["name"], key_info["png"]
+    # 篩選列
+    filter_frame = tk.Frame(keys_list_frame)
+    filter_frame.pack(fill='x', pady=(0, 10))
+    tk.Label(filter_frame, text="篩選（名稱、掃描碼、圖片檔名）:", font=('Arial', 12)).pack(side='left')
+    filter_var = tk.StringVar()
+    filter_entry = tk.Entry(filter_frame, textvariable=filter_var, font=('Arial', 12), width=30)
+    filter_entry.pack(side='left', padx=(10, 0))
+    count_label = tk.Label(filter_frame, text='', font=('Arial', 10), fg='#666666')
+    count_label.pack(side='left', padx=(10, 0))
     
-    # 如果找不到，返回原始 ID 和空字串
-    return key_id, ""
-
-def get_display_name_for_empty_key(row_name, col_index):
-    """為空字串按鍵提供更有意義的顯示名稱"""
-    if row_name == "第五列" and col_index == 1:
-        return "Shift間隔", ""
-    elif row_name == "第六列" and col_index in [4, 5, 6, 7, 8, 9]:
-        return "Space間隔", ""
-    else:
-        return "空白", ""
-
-def create_key_column(parent_frame, title, row_keys):
-    """創建按鍵列的通用函數"""
-    # 創建列標題
-    tk.Label(parent_frame, text=title, font=('Arial', 12, 'bold')).pack(pady=(0, 1))
+    # 按鍵表格
+    columns = [("name", "按鍵名稱", 160), ("key_id", "按鍵 ID", 80), ("scan_code", "掃描碼", 140),
+               ("png", "圖片檔名", 220), ("position", "配置位置", 220)]
+    tree = ttk.Treeview(keys_list_frame, columns=[column for column, _, _ in columns],
+                        show='headings', selectmode='browse')
+    for column, title, width in columns:
+        tree.heading(column, text=title)
+        tree.column(column, width=width, anchor='w')
+    tree_scrollbar = ttk.Scrollbar(keys_list_frame, orient='vertical', command=tree.yview)
+    tree.configure(yscrollcommand=tree_scrollbar.set)
+    tree.pack(side='left', fill='both', expand=True)
+    tree_scrollbar.pack(side='right', fill='y')
     
-    # 創建按鍵列表
-    for key_id in row_keys:
-        # 創建按鍵名稱和圖片檔名的容器
-        key_container = tk.Frame(parent_frame)
-        key_container.pack(anchor='w', pady=2)
-        
-        # 使用 get_key_map_info 函數獲取按鍵資訊
-        key_name, image_filename = get_key_map_info(key_id)
-        
-        # 按鍵名稱（顯示 key_map 的 name）
-        tk.Label(key_container, text=key_name, font=('Arial', 10), width=10, anchor='w').pack(side='left')
-        
-        # 圖片檔案名稱（可選擇但不能編輯）
-        png_entry = tk.Entry(key_container, font=('Arial', 9), width=15, state='readonly')
-        png_entry.pack(side='left', padx=(5, 0))
-        
-        # 設定唯讀模式的文字內容
-        png_entry.config(state='normal')
-        png_entry.insert(0, image_filename)
-        png_entry.config(state='readonly')
-
-# 創建主鍵區按鍵列表框架
-keys_list_frame = tk.Frame(keys_list_tab)
-keys_list_frame.pack(fill='both', expand=True, padx=10, pady=10)
-
-# 創建分頁容器
-keys_notebook = ttk.Notebook(keys_list_frame)
-keys_notebook.pack(fill='both', expand=True)
-
-# 主鍵區分頁
-main_keys_tab = ttk.Frame(keys_notebook)
-keys_notebook.add(main_keys_tab, text="主鍵區")
-
-# 次鍵區分頁
-sub_keys_tab = ttk.Frame(keys_notebook)
-keys_notebook.add(sub_keys_tab, text="次鍵區")
-
-# 主鍵區內容
-main_keys_frame = tk.Frame(main_keys_tab)
-main_keys_frame.pack(fill='both', expand=True, padx=10, pady=10)
-
-# 創建水平排列的容器框架
-horizontal_frame = tk.Frame(main_keys_frame)
-horizontal_frame.pack(fill='x', expand=True)
-
-# 定義各列的 ID 陣列
-first_row_keys = ["1", "59", "60", "61", "62", "63", "64", "65", "66", "67", "68", "87", "88"]
-second_row_keys = ["41", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14"]
-third_row_keys = ["15", "16", "17", "18", "19", "20", "21", "22", "23", "24", "25", "26", "27", "43"]
-fourth_row_keys = ["58", "30", "31", "32", "33", "34", "35", "36", "37", "38", "39", "40", "28"]
-fifth_row_keys = ["42", "44", "45", "46", "47", "48", "49", "50", "51", "52", "53", "54"]
-sixth_row_keys = ["29", "91", "56", "57", "100", "92", "93", "97"]
-
-# 創建各列
-col1_frame = tk.Frame(horizontal_frame)
-col1_frame.pack(side='left', fill='y', padx=(0, 30))
-create_key_column(col1_frame, "第一列", first_row_keys)
-
-# 添加垂直分隔線
-separator_line = tk.Frame(horizontal_frame, width=2, bg='lightgray')
-separator_line.pack(side='left', fill='y', padx=(0, 40))
-
-col2_frame = tk.Frame(horizontal_frame)
-col2_frame.pack(side='left', fill='y', padx=(0, 40))
-create_key_column(col2_frame, "第二列", second_row_keys)
-
-# 添加垂直分隔線
-separator_line = tk.Frame(horizontal_frame, width=2, bg='lightgray')
-separator_line.pack(side='left', fill='y', padx=(0, 40))
-
-col3_frame = tk.Frame(horizontal_frame)
-col3_frame.pack(side='left', fill='y', padx=(0, 40))
-create_key_column(col3_frame, "第三列", third_row_keys)
-
-# 添加垂直分隔線
-separator_line = tk.Frame(horizontal_frame, width=2, bg='lightgray')
-separator_line.pack(side='left', fill='y', padx=(0, 40))
-
-col4_frame = tk.Frame(horizontal_frame)
-col4_frame.pack(side='left', fill='y', padx=(0, 40))
-create_key_column(col4_frame, "第四列", fourth_row_keys)
-
-# 添加垂直分隔線
-separator_line = tk.Frame(horizontal_frame, width=2, bg='lightgray')
-separator_line.pack(side='left', fill='y', padx=(0, 40))
-
-col5_frame = tk.Frame(horizontal_frame)
-col5_frame.pack(side='left', fill='y', padx=(0, 40))
-create_key_column(col5_frame, "第五列", fifth_row_keys)
-
-# 添加垂直分隔線
-separator_line = tk.Frame(horizontal_frame, width=2, bg='lightgray')
-separator_line.pack(side='left', fill='y', padx=(0, 30))
-
-col6_frame = tk.Frame(horizontal_frame)
-col6_frame.pack(side='left', fill='y', padx=(0, 30))
-create_key_column(col6_frame, "第六列", sixth_row_keys)
-
-# 次鍵區內容
-sub_keys_frame = tk.Frame(sub_keys_tab)
-sub_keys_frame.pack(fill='both', expand=True, padx=10, pady=10)
-
-# 創建次鍵區的水平排列容器
-sub_horizontal_frame = tk.Frame(sub_keys_frame)
-sub_horizontal_frame.pack(fill='x', expand=True)
-
-# 定義次鍵區的 ID 陣列（合併所有次鍵）
-sub_keys_all = ["99", "70", "119", "110", "101", "103", "111", "107", "109", "102", "104", "108", "106"]  # PrtSc, ScrLk, Pause, Ins, Home, PageUp, Del, End, PageDown, ↑, ←, ↓, →
-
-# 定義數字鍵區的 ID 陣列
-num_keys_first_row = ["82", "79", "80", "81", "75", "76", "77", "71", "72", "73"]  # Num0, Num1, Num2, Num3, Num4, Num5, Num6, Num7, Num8, Num9
-num_keys_second_row = ["69", "98", "55", "74","78", "83", "96"]  # NumEnter, Num/, Num*, Num-, Num+, Num., Num/  
-
-# 創建次鍵區
-sub_col_frame = tk.Frame(sub_horizontal_frame)
-sub_col_frame.pack(side='left', fill='y', padx=(0, 40))
-create_key_column(sub_col_frame, "次鍵區", sub_keys_all)
-
-# 添加垂直分隔線
-separator_line = tk.Frame(sub_horizontal_frame, width=2, bg='lightgray')
-separator_line.pack(side='left', fill='y', padx=(0, 40))
-
-# 創建數字鍵區（分成兩行並排顯示）
-num_col_frame = tk.Frame(sub_horizontal_frame)
-num_col_frame.pack(side='left', fill='y', padx=(0, 30))
-
-# 創建水平排列的容器
-num_horizontal_frame = tk.Frame(num_col_frame)
-num_horizontal_frame.pack(fill='x', expand=True, anchor='n')
-
-# 第一行：數字鍵
-num_keys_frame = tk.Frame(num_horizontal_frame)
-num_keys_frame.pack(side='left', fill='y', padx=(0, 20), anchor='n')
-create_key_column(num_keys_frame, "數字鍵", num_keys_first_row)
-
-# 第二行：功能鍵
-num_func_frame = tk.Frame(num_horizontal_frame)
-num_func_frame.pack(side='left', fill='y', padx=(0, 0), anchor='n')
-create_key_column(num_func_frame, "功能鍵", num_keys_second_row)
+    # 每個按鍵在目前鍵盤配置中的位置
+    positions = {}
+    for section_name, rows in keyboard_layout.sections:
+        for row_idx, row_keys in enumerate(rows):
+            for key_id in row_keys:
+                positions.setdefault(key_id, f"{section_name} 第{row_idx + 1}列")
+    
+    # 依 key_map 順序插入所有按鍵，並準備篩選用的小寫文字
+    search_texts = []  # [(列 ID, 搜尋文字)]
+    for record in key_map:
+        row_id = str(record.slot)
+        scan_text = f"{record.scan_code}（數字鍵盤）" if record.is_keypad else str(record.scan_code)
+        tree.insert('', 'end', iid=row_id,
+                    values=(record.name, record.key_id, scan_text, record.png, positions.get(record.key_id, '')))
+        search_texts.append((row_id, f"{record.name}\n{record.scan_code}\n{record.png}".lower()))
+    
+    def apply_filter(*_):
+        """只保留符合篩選文字的列（一次設定所有子項目，不逐列移動）"""
+        query = filter_var.get().strip().lower()
+        matches = [row_id for row_id, text in search_texts if query in text]
+        tree.set_children('', *matches)
+        count_label.config(text=f"{len(matches)} / {len(search_texts)} 個按鍵")
+    
+    filter_var.trace_add('write', apply_filter)
+    apply_filter()
 
 # 關於分頁內容
-# 創建關於頁面的框架
-about_frame = tk.Frame(about_tab)
-about_frame.pack(fill='both', expand=True, padx=20, pady=20)
-
-# 創建水平排列的容器框架
-about_horizontal_frame = tk.Frame(about_frame)
-about_horizontal_frame.pack(fill='both', expand=True)
-
-# 左側：關於區域
-about_left_frame = tk.Frame(about_horizontal_frame)
-about_left_frame.pack(side='left', fill='both', expand=True, padx=(0, 20))
-
-# 標題
-title_label = tk.Label(about_left_frame, text="鍵盤偵測工具", 
-                       font=('Arial', 24, 'bold'), fg='#333333')
-title_label.pack(pady=(20, 0))
-
-# 版本資訊
-version_label = tk.Label(about_left_frame, text="版本: 1.0.0", 
-                         font=('Arial', 14), fg='#666666')
-version_label.pack(pady=(0, 10))
-
 # 功能說明
 features_text = """使用說明：
 1. 程式會自動偵測鍵盤按鍵
 2. 在 user 資料夾中放入自訂按鍵圖片
 3. 圖片名稱必須與按鍵列表中的名稱相符
-4. 放入新圖片後需要重啟程式
+4. 放入或修改圖片後會自動重新載入
 5. 圖片最小建議為 60px * 60px
 
 注意事項：
@@ -1140,29 +1016,6 @@ features_text = """使用說明：
 - 即時按鍵尺寸設定，必須按照格式: 寬度x高度
 """
 
-features_label = tk.Label(about_left_frame, text=features_text, 
-                         font=('Arial', 12), fg='#444444',
-                         justify='left', anchor='w')
-features_label.pack(pady=(0, 20))
-
-# 版權資訊（移到左側功能說明下方）
-copyright_label = tk.Label(about_left_frame, text="Copyright © 2025 shanshan 版權所有", 
-                           font=('Arial', 10), fg='#888888')
-copyright_label.pack(pady=(0, 30))
-
-# 右側：設置區域
-about_right_frame = tk.Frame(about_horizontal_frame)
-about_right_frame.pack(side='right', fill='both', expand=True, padx=(20, 0))
-
-# 設置標題
-settings_title_label = tk.Label(about_right_frame, text="設置", 
-                               font=('Arial', 24, 'bold'), fg='#333333')
-settings_title_label.pack(pady=(10, 10))
-
-# 創建設置框架
-settings_frame = tk.Frame(about_right_frame)
-settings_frame.pack(fill='both', expand=True, padx=10, pady=20)
-
 def create_setting_item(parent, label_text, value_text, row, config_key):
     """創建單個設置項目"""
     # 標籤 - 使用 'e' 對齊並置中
@@ -1210,6 +1063,9 @@ def create_setting_items(parent):
     create_setting_item(parent, "即時按鍵尺寸:", f"{config.get('realtime_image_size', DEFAULT_CONFIG['realtime_image_size'])[0]} x {config.get('realtime_image_size', DEFAULT_CONFIG['realtime_image_size'])[1]}", 3, "realtime_image_size")
     create_setting_item(parent, "每行按鍵數量:", config.get('max_keys_per_row', DEFAULT_CONFIG['max_keys_per_row']), 4, "max_keys_per_row")
     create_setting_item(parent, "最大行數:", config.get('max_rows', DEFAULT_CONFIG['max_rows']), 5, "max_rows")
+    if REALTIME_RENDERER == "history":
+        # 紀錄模式不會在滿行時清空，最大行數沒有作用
+        parent.entries['max_rows'].config(state='disabled')
     
     # 即時按鍵背景設定
     background_options = ["預設", "藍幕", "綠幕"]
@@ -1251,20 +1107,94 @@ def create_settings_buttons(parent):
                             padx=20, pady=8)
     save_button.grid(row=0, column=1, padx=(10, 0))
 
-# 創建設置項目
-create_setting_items(settings_frame)
-
-# 創建狀態標籤並保存引用到settings_frame（移到按鈕上方）
-save_status_label = tk.Label(settings_frame, text="", font=('Arial', 10), fg="green")
-save_status_label.grid(row=7, column=0, columnspan=2, pady=(0, 0), sticky='ew')
-settings_frame.save_status_label = save_status_label
-
-# 創建按鈕
-create_settings_buttons(settings_frame)
-
-# 添加垂直分隔線
-separator_line = tk.Frame(about_horizontal_frame, width=2, bg='lightgray')
-separator_line.pack(side='left', fill='y', padx=(0, 0))
+def build_about_tab():
+    """建立關於與設置分頁的內容"""
+    # 創建關於頁面的框架
+    about_frame = tk.Frame(about_tab)
+    about_frame.pack(fill='both', expand=True, padx=20, pady=20)
+
+    # 創建水平排列的容器框架
+    about_horizontal_frame = tk.Frame(about_frame)
+    about_horizontal_frame.pack(fill='both', expand=True)
+
+    # 左側：關於區域
+    about_left_frame = tk.Frame(about_horizontal_frame)
+    about_left_frame.pack(side='left', fill='both', expand=True, padx=(0, 20))
+
+    # 標題
+    title_label = tk.Label(about_left_frame, text="鍵盤偵測工具", 
+                           font=('Arial', 24, 'bold'), fg='#333333')
+    title_label.pack(pady=(20, 0))
+
+    # 版本資訊
+    version_label = tk.Label(about_left_frame, text="版本: 1.0.0", 
+                             font=('Arial', 14), fg='#666666')
+    version_label.pack(pady=(0, 10))
+
+    features_label = tk.Label(about_left_frame, text=features_text, 
+                             font=('Arial', 12), fg='#444444',
+                             justify='left', anchor='w')
+    features_label.pack(pady=(0, 20))
+
+    # 版權資訊（移到左側功能說明下方）
+    copyright_label = tk.Label(about_left_frame, text="Copyright © 2025 shanshan 版權所有", 
+                               font=('Arial', 10), fg='#888888')
+    copyright_label.pack(pady=(0, 30))
+
+    # 右側：設置區域
+    about_right_frame = tk.Frame(about_horizontal_frame)
+    about_right_frame.pack(side='right', fill='both', expand=True, padx=(20, 0))
+
+    # 設置標題
+    settings_title_label = tk.Label(about_right_frame, text="設置", 
+                                   font=('Arial', 24, 'bold'), fg='#333333')
+    settings_title_label.pack(pady=(10, 10))
+
+    # 創建設置框架
+    settings_frame = tk.Frame(about_right_frame)
+    settings_frame.pack(fill='both', expand=True, padx=10, pady=20)
+
+    # 創建設置項目
+    create_setting_items(settings_frame)
+
+    # 創建狀態標籤並保存引用到settings_frame（移到按鈕上方）
+    save_status_label = tk.Label(settings_frame, text="", font=('Arial', 10), fg="green")
+    save_status_label.grid(row=7, column=0, columnspan=2, pady=(0, 0), sticky='ew')
+    settings_frame.save_status_label = save_status_label
+
+    # 創建按鈕
+    create_settings_buttons(settings_frame)
+
+    # 添加垂直分隔線
+    separator_line = tk.Frame(about_horizontal_frame, width=2, bg='lightgray')
+    separator_line.pack(side='left', fill='y', padx=(0, 0))
+
+# 延遲建立分頁：啟動時只建立即時按鍵分頁，其他分頁在第一次被選取時才建立
+TAB_PREWARM_DELAY = 1000    # 啟動後多久開始在閒置時預先建立分頁（毫秒）
+TAB_PREWARM_INTERVAL = 200  # 預先建立兩個分頁之間的間隔（毫秒），讓按鍵事件有機會先處理
+tab_builders = {str(keyboard_tab): build_keyboard_tab,
+                str(keys_list_tab): build_keys_list_tab,
+                str(about_tab): build_about_tab}  # {分頁名稱: 建立函式}，建立後移除
+
+def ensure_tab_built(tab_name):
+    """分頁內容尚未建立時立即建立"""
+    builder = tab_builders.pop(tab_name, None)
+    if builder is not None:
+        builder()
+
+def on_tab_changed(event):
+    """切換分頁時建立該分頁的內容"""
+    ensure_tab_built(notebook.select())
+
+def prewarm_tabs():
+    """閒置時一次建立一個尚未建立的分頁"""
+    if tab_builders:
+        ensure_tab_built(next(iter(tab_builders)))
+        root.after(TAB_PREWARM_INTERVAL, lambda: root.after_idle(prewarm_tabs))
+
+notebook.bind('<<NotebookTabChanged>>', on_tab_changed)
+if PREWARM_TABS:
+    root.after(TAB_PREWARM_DELAY, lambda: root.after_idle(prewarm_tabs))
 
 
 # 設置管理相關函數
@@ -1319,9 +1249,17 @@ def save_config(parent):
         # 重新設定視窗大小
         set_window_size()
         
+        # 依新的每行數量與行數重建顯示槽
+        clear_all_keys()
+        render_scheduler.flush()
+        key_strip.resize(MAX_KEYS_PER_ROW, MAX_ROWS, get_realtime_colors()[0], REALTIME_IMAGE_SIZE)
+        
         # 應用新的背景設定
         apply_realtime_background()
         
+        # 依新的尺寸與背景重新產生即時按鍵圖片
+        warm_realtime_sprites()
+        
     except Exception as e:
         parent.save_status_label.config(text=f"儲存失敗: {str(e)}", fg="red")
         parent.save_status_label.after(3000, lambda: parent.save_status_label.config(text="", fg="red"))
@@ -1377,14 +1315,44 @@ def set_window_size():
 set_window_size()
 
 # 鍵盤監聽
+# keyboard 的回呼在監聽執行緒上執行，不能直接操作 Tk 元件，也不呼叫任何 Tcl 函式；
+# 事件先放入佇列（deque 的 append/popleft 為原子操作，不需加鎖）並設定旗標，
+# 再由 Tk 執行緒以 root.after 批次處理：有事件時每一個畫格處理一次，
+# 佇列清空後改為低頻率只檢查旗標
+EVENT_QUEUE_SIZE = 4096    # 佇列上限，超過時捨棄最舊的事件
+EVENT_POLL_INTERVAL = 16   # 有事件時處理佇列的間隔（毫秒，約 60 FPS）
+EVENT_IDLE_INTERVAL = 50   # 佇列清空後檢查旗標的間隔（毫秒）
+key_event_queue = deque(maxlen=EVENT_QUEUE_SIZE)
+key_event_pending = threading.Event()  # 監聽執行緒放入事件後設定，Tk 執行緒處理前清除
+
 def keyboard_event_handler(event):
-    """統一的鍵盤事件處理函數"""
-    if event.event_type == keyboard.KEY_DOWN:
-        show_key(event)
-    elif event.event_type == keyboard.KEY_UP:
-        hide_key(event)
+    """統一的鍵盤事件處理函數（監聽執行緒，只放入佇列並設定旗標）"""
+    key_event_queue.append(event)
+    key_event_pending.set()
+
+def process_key_events():
+    """在 Tk 執行緒上一次處理佇列中所有的鍵盤事件"""
+    active = key_event_pending.is_set()
+    try:
+        if active:
+            # 先清除旗標：處理期間新加入的事件會再設定一次，下一個畫格處理
+            key_event_pending.clear()
+            for _ in range(len(key_event_queue)):
+                key_event = key_event_queue.popleft()
+                try:
+                    if key_event.event_type == keyboard.KEY_DOWN:
+                        show_key(key_event)
+                    elif key_event.event_type == keyboard.KEY_UP:
+                        hide_key(key_event)
+                except Exception as e:
+                    # 單一事件失敗不影響之後的事件
+                    print(f"處理鍵盤事件失敗 {key_event.name}: {e}")
+    finally:
+        # 無論處理結果如何都重新排程，不會因例外而停止
+        root.after(EVENT_POLL_INTERVAL if active else EVENT_IDLE_INTERVAL, process_key_events)
 
 keyboard.hook(keyboard_event_handler)
+process_key_events()
 
 # 設定焦點到根視窗以接收鍵盤事件
 root.focus_set()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+多解析度（mip chain）圖片 - 原圖只解碼一次，所有尺寸都由同一組縮小版本產生
+
+每一層都是上一層以 BOX 平均縮小一半（Image.reduce），產生某個尺寸時
+從「仍不小於目標」的最小一層開始縮放：
+- 縮小：最後一步最多縮小兩倍，使用呼叫端指定的濾鏡（LANCZOS / BICUBIC）
+- 放大（例如 Space 的寬度）：改用 BICUBIC，避免 LANCZOS 的振鈴
+"""
+
+import threading
+
+from PIL import Image
+
+
+class MipChain:
+    """同一張原圖的各層縮小版本（可在多個執行緒同時使用）"""
+
+    def __init__(self, load, on_level=None):
+        self._load = load          # 解碼原圖的函式，第一次需要時才呼叫
+        self._on_level = on_level  # 產生新的一層後呼叫 on_level(位元組數)，供呼叫端統計記憶體
+        self._levels = []          # [原圖, 1/2, 1/4, ...]，依需要產生
+        self._lock = threading.Lock()        # 只在讀寫 _levels 時持有
+        self._build_lock = threading.Lock()  # 同一組的解碼與縮小只由一個執行緒進行
+
+    def _level_for(self, size):
+        """不小於目標尺寸的最小一層"""
+        i = 0
+        while True:
+            with self._lock:
+                level = self._levels[i] if i < len(self._levels) else None
+            if level is None:
+                level = self._build(i)
+            if level.width // 2 < size[0] or level.height // 2 < size[1]:
+                return level
+            i += 1
+
+    def _build(self, i):
+        """產生第 i 層：解碼與縮小時不持有 _lock，完成後才放入清單"""
+        with self._build_lock:
+            with self._lock:
+                if i < len(self._levels):
+                    return self._levels[i]  # 其他執行緒剛產生
+                previous = self._levels[i - 1] if i else None
+            level = self._load().convert("RGBA") if previous is None else previous.reduce(2)
+            with self._lock:
+                self._levels.append(level)
+        if self._on_level is not None:
+            self._on_level(level.width * level.height * 4)
+        return level
+
+    def resize(self, size, resample=Image.Resampling.LANCZOS):
+        """產生指定尺寸的圖片"""
+        size = tuple(size)
+        level = self._level_for(size)
+        if level.size == size:
+            return level.copy()
+        if level.width < size[0] or level.height < size[1]:
+            resample = Image.Resampling.BICUBIC
+        return level.resize(size, resample)
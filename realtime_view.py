@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+"""
+即時按鍵顯示區 - 預先建立固定數量的顯示槽，以環狀緩衝區管理
+
+提供兩種繪製方式，介面相同：
+- LabelKeyStrip：每個按鍵一個 Label
+- CanvasKeyStrip：所有按鍵都是同一個 Canvas 上的項目
+
+另有 HistoryKeyStrip（預設）：不限數量，顯示整個工作階段的按鍵紀錄，
+只為可見的列指定圖片。
+"""
+
+import time
+import tkinter as tk
+
+
+class LabelKeyStrip:
+    """固定容量的按鍵顯示槽（環狀緩衝區）
+
+    所有 Label 在建立時就建立並隱藏，之後新增按鍵只需重新設定單一 Label，
+    不會建立或銷毀任何元件。位置依按鍵先後（與最舊按鍵的距離）決定；
+    移除最舊的按鍵只會隱藏，其餘按鍵在 reflow() 時一次前移（每個畫格最多一次）。
+    """
+
+    def __init__(self, parent, columns, rows, bg):
+        self.parent = parent
+        self.slots = []
+        self.head = 0   # 最舊按鍵所在的槽位
+        self.count = 0  # 目前顯示中的按鍵數量
+        self._moved = False  # 移除過最舊的按鍵，其餘按鍵尚未前移
+        self._build(columns, rows, bg)
+
+    def _build(self, columns, rows, bg):
+        """建立所有顯示槽並隱藏"""
+        self.columns = max(1, columns)
+        self.rows = max(1, rows)
+        for i in range(self.columns * self.rows):
+            label = tk.Label(self.parent, borderwidth=0, font=('Arial', 10), bg=bg)
+            label.grid(row=i // self.columns, column=i % self.columns, padx=2, pady=2, sticky='nw')
+            label.grid_remove()  # 保留 grid 設定，之後 grid() 即可顯示
+            label.image = None
+            self.slots.append(label)
+
+    @property
+    def capacity(self):
+        return len(self.slots)
+
+    def __len__(self):
+        return self.count
+
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def _place(self, index):
+        """依按鍵先後把顯示槽放到對應的格子並顯示"""
+        age = (index - self.head) % self.capacity
+        self.slots[index].grid(row=age // self.columns, column=age % self.columns)
+
+    def push(self, image=None, text='', bg=None, fg='black'):
+        """在最後位置顯示一個按鍵，已滿時移除最舊的按鍵"""
+        if self.is_full():
+            self.evict_oldest()
+        index = (self.head + self.count) % self.capacity
+        label = self.slots[index]
+        label.configure(image=image or '', text='' if image else text, bg=bg, fg=fg)
+        # 保存圖片引用以防止垃圾回收
+        label.image = image
+        self._place(index)
+        self.count += 1
+        return index
+
+    def _hide_oldest(self):
+        label = self.slots[self.head]
+        label.grid_remove()
+        label.configure(image='', text='')
+        label.image = None
+        self.head = (self.head + 1) % self.capacity
+        self.count -= 1
+
+    def evict_oldest(self, count=1):
+        """移除最早的 count 個按鍵（只隱藏，其餘按鍵在 reflow() 時前移）"""
+        for _ in range(min(count, self.count)):
+            self._hide_oldest()
+            self._moved = True
+
+    def reflow(self):
+        """移除過按鍵後，把其餘按鍵依先後放回前面的格子"""
+        if not self._moved:
+            return
+        self._moved = False
+        for age in range(self.count):
+            self._place((self.head + age) % self.capacity)
+
+    def clear(self):
+        """隱藏所有按鍵"""
+        while self.count:
+            self._hide_oldest()
+        self.head = 0
+        self._moved = False
+
+    def shows(self, image):
+        """圖片是否正在某個顯示槽中"""
+        return any(label.image is image for label in self.slots)
+
+    def set_image(self, age, image):
+        """換掉從最舊算起第 age 個按鍵的圖片（淡出時使用）"""
+        label = self.slots[(self.head + age) % self.capacity]
+        if label.image is not None and label.image is not image:
+            label.configure(image=image)
+            label.image = image
+
+    def set_text(self, age, text):
+        """從最舊算起第 age 個按鍵改為顯示文字（圖片被刪除時使用）"""
+        label = self.slots[(self.head + age) % self.capacity]
+        label.configure(image='', text=text)
+        label.image = None
+
+    def replace_image(self, old, new):
+        """把正在顯示的 old 圖片換成 new（圖片重新載入時使用）"""
+        for label in self.slots:
+            if label.image is old:
+                label.configure(image=new)
+                label.image = new
+
+    def set_colors(self, bg, fg):
+        """更新所有顯示槽的背景與文字顏色"""
+        for label in self.slots:
+            label.configure(bg=bg, fg=fg)
+
+    def resize(self, columns, rows, bg, cell_size=None):
+        """每行數量或行數改變時重新建立顯示槽（Label 會自動配合圖片尺寸）"""
+        if max(1, columns) == self.columns and max(1, rows) == self.rows:
+            return
+        for label in self.slots:
+            label.destroy()
+        self.slots = []
+        self.head = 0
+        self.count = 0
+        self._moved = False
+        self._build(columns, rows, bg)
+
+
+class CanvasKeyStrip:
+    """單一 Canvas 的按鍵顯示區
+
+    每個顯示槽是同一個 Canvas 上的一組圖片與文字項目，新增按鍵時只
+    移動座標並更換圖片，成本與畫面上的按鍵數量無關。
+    位置依按鍵先後決定；移除最舊的按鍵只會隱藏，其餘按鍵在 reflow() 時一次前移。
+    """
+
+    TAG = 'key_strip'
+
+    def __init__(self, canvas, columns, rows, bg, cell_size):
+        self.canvas = canvas
+        self.slots = []  # [(圖片項目, 文字項目)]
+        self.images = []  # 各槽位目前的圖片引用，防止垃圾回收
+        self.head = 0
+        self.count = 0
+        self._moved = False  # 移除過最舊的按鍵，其餘按鍵尚未前移
+        self._build(columns, rows, cell_size)
+
+    def _build(self, columns, rows, cell_size):
+        """建立所有顯示槽項目並隱藏"""
+        self.columns = max(1, columns)
+        self.rows = max(1, rows)
+        # 每格四周保留 2px 間距，與 Label 版本的 padx/pady 相同
+        self.cell_w = cell_size[0] + 4
+        self.cell_h = cell_size[1] + 4
+        for _ in range(self.columns * self.rows):
+            image_item = self.canvas.create_image(0, 0, anchor='nw', state='hidden', tags=self.TAG)
+            text_item = self.canvas.create_text(0, 0, anchor='nw', state='hidden', tags=self.TAG,
+                                                font=('Arial', 10))
+            self.slots.append((image_item, text_item))
+            self.images.append(None)
+        # 捲動範圍固定為所有顯示槽的大小，不需隨按鍵重新計算
+        self.canvas.configure(scrollregion=(0, 0, self.columns * self.cell_w, self.rows * self.cell_h))
+
+    @property
+    def capacity(self):
+        return len(self.slots)
+
+    def __len__(self):
+        return self.count
+
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def _place(self, index):
+        """依按鍵先後把第 index 個槽位的項目移到對應格子的左上角"""
+        age = (index - self.head) % self.capacity
+        x = (age % self.columns) * self.cell_w + 2
+        y = (age // self.columns) * self.cell_h + 2
+        for item in self.slots[index]:
+            self.canvas.coords(item, x, y)
+
+    def push(self, image=None, text='', bg=None, fg='black'):
+        """在最後位置顯示一個按鍵，已滿時移除最舊的按鍵"""
+        if self.is_full():
+            self.evict_oldest()
+        index = (self.head + self.count) % self.capacity
+        image_item, text_item = self.slots[index]
+        self._place(index)
+        if image:
+            self.canvas.itemconfigure(image_item, image=image, state='normal')
+        else:
+            self.canvas.itemconfigure(text_item, text=text, fill=fg, state='normal')
+        self.images[index] = image
+        self.count += 1
+        return index
+
+    def _hide_oldest(self):
+        image_item, text_item = self.slots[self.head]
+        self.canvas.itemconfigure(image_item, image='', state='hidden')
+        self.canvas.itemconfigure(text_item, text='', state='hidden')
+        self.images[self.head] = None
+        self.head = (self.head + 1) % self.capacity
+        self.count -= 1
+
+    def evict_oldest(self, count=1):
+        """移除最早的 count 個按鍵（只隱藏，其餘按鍵在 reflow() 時前移）"""
+        for _ in range(min(count, self.count)):
+            self._hide_oldest()
+            self._moved = True
+
+    def reflow(self):
+        """移除過按鍵後，把其餘按鍵依先後移回前面的格子"""
+        if not self._moved:
+            return
+        self._moved = False
+        for age in range(self.count):
+            self._place((self.head + age) % self.capacity)
+
+    def clear(self):
+        """隱藏所有按鍵"""
+        while self.count:
+            self._hide_oldest()
+        self.head = 0
+        self._moved = False
+
+    def shows(self, image):
+        """圖片是否正在某個顯示槽中"""
+        return any(shown is image for shown in self.images)
+
+    def set_image(self, age, image):
+        """換掉從最舊算起第 age 個按鍵的圖片（淡出時使用）"""
+        index = (self.head + age) % self.capacity
+        if self.images[index] is not None and self.images[index] is not image:
+            self.canvas.itemconfigure(self.slots[index][0], image=image)
+            self.images[index] = image
+
+    def set_text(self, age, text):
+        """從最舊算起第 age 個按鍵改為顯示文字（圖片被刪除時使用）"""
+        index = (self.head + age) % self.capacity
+        image_item, text_item = self.slots[index]
+        self.canvas.itemconfigure(image_item, image='', state='hidden')
+        self.canvas.itemconfigure(text_item, text=text, state='normal')
+        self.images[index] = None
+
+    def replace_image(self, old, new):
+        """把正在顯示的 old 圖片換成 new（圖片重新載入時使用）"""
+        for index, image in enumerate(self.images):
+            if image is old:
+                self.canvas.itemconfigure(self.slots[index][0], image=new)
+                self.images[index] = new
+
+    def set_colors(self, bg, fg):
+        """更新文字顏色（背景由 Canvas 本身決定）"""
+        for _, text_item in self.slots:
+            self.canvas.itemconfigure(text_item, fill=fg)
+
+    def resize(self, columns, rows, bg, cell_size=None):
+        """每行數量、行數或按鍵尺寸改變時重新建立顯示槽"""
+        cell_size = cell_size or (self.cell_w - 4, self.cell_h - 4)
+        if (max(1, columns), max(1, rows), cell_size[0] + 4, cell_size[1] + 4) == \
+                (self.columns, self.rows, self.cell_w, self.cell_h):
+            return
+        self.canvas.delete(self.TAG)
+        self.slots = []
+        self.images = []
+        self.head = 0
+        self.count = 0
+        self._moved = False
+        self._build(columns, rows, cell_size)
+
+
+class HistoryKeyStrip:
+    """整個工作階段按鍵紀錄的虛擬化顯示（單一 Canvas）
+
+    紀錄本身只是 KeyHistory 中的槽位與時間；Canvas 上只建立可見列所需的
+    項目，捲動時依可見範圍重新指定位置與圖片，成本與紀錄長度無關。
+    圖片由 sprite_for(槽位, 按下時間) → (ImageTk物件或 None, 按鍵名稱) 在繪製時取得，
+    索引小於 start 的紀錄已過期，不再顯示（位置不變）。
+    """
+
+    TAG = 'key_history'
+
+    def __init__(self, canvas, history, columns, cell_size, sprite_for, scrollbar=None):
+        self.canvas = canvas
+        self.history = history
+        self.sprite_for = sprite_for
+        self.scrollbar = scrollbar
+        self.follow = True   # 捲到最底時，新按鍵會自動捲入畫面
+        self.start = 0       # 第一筆尚未過期的紀錄
+        self.fg = 'black'
+        self.slots = []      # [(圖片項目, 文字項目)]，依可見範圍重複使用
+        self.images = []     # 各項目目前的圖片引用，防止垃圾回收
+        self._shown = []     # 各項目目前顯示的 (紀錄索引, 圖片)，沒變時不重新設定
+        self._height = None  # 目前的捲動範圍高度
+        self._set_geometry(columns, cell_size)
+        canvas.configure(yscrollcommand=self._on_scroll)
+        canvas.bind('<Configure>', lambda e: self.refresh(), add='+')
+
+    def _set_geometry(self, columns, cell_size):
+        self.columns = max(1, columns)
+        # 每格四周保留 2px 間距，與其他顯示方式相同
+        self.cell_w = cell_size[0] + 4
+        self.cell_h = cell_size[1] + 4
+
+    def _on_scroll(self, first, last):
+        """Canvas 捲動或大小改變：更新捲軸並重新指定可見的列"""
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        self.follow = float(last) >= 0.999
+        self._draw_visible()
+
+    def _ensure_slots(self, count):
+        """可見的格數變多時補建項目（不會減少）"""
+        while len(self.slots) < count:
+            image_item = self.canvas.create_image(0, 0, anchor='nw', state='hidden', tags=self.TAG)
+            text_item = self.canvas.create_text(0, 0, anchor='nw', state='hidden', tags=self.TAG,
+                                                font=('Arial', 10), fill=self.fg)
+            self.slots.append((image_item, text_item))
+            self.images.append(None)
+            self._shown.append(None)
+
+    def _hide(self, i):
+        if self._shown[i] is None:
+            return
+        image_item, text_item = self.slots[i]
+        self.canvas.itemconfigure(image_item, image='', state='hidden')
+        self.canvas.itemconfigure(text_item, text='', state='hidden')
+        self.images[i] = None
+        self._shown[i] = None
+
+    def refresh(self):
+        """紀錄有變動後呼叫：更新捲動範圍，跟隨最新按鍵並重繪可見的列"""
+        rows = -(-len(self.history) // self.columns)
+        height = rows * self.cell_h
+        if height != self._height:
+            self._height = height
+            self.canvas.configure(scrollregion=(0, 0, self.columns * self.cell_w, height))
+        if self.follow:
+            self.canvas.yview_moveto(1.0)
+        self._draw_visible()
+
+    def _draw_visible(self):
+        """只為可見的列指定位置與圖片"""
+        first_row = max(0, int(self.canvas.canvasy(0)) // self.cell_h)
+        visible_rows = self.canvas.winfo_height() // self.cell_h + 2
+        self._ensure_slots(visible_rows * self.columns)
+        start = first_row * self.columns
+        total = len(self.history)
+        for i in range(len(self.slots)):
+            index = start + i
+            if index >= total or index < self.start:
+                self._hide(i)
+                continue
+            image, text = self.sprite_for(self.history.slots[index], self.history.times[index])
+            if self._shown[i] == (index, image):
+                continue
+            image_item, text_item = self.slots[i]
+            x = (index % self.columns) * self.cell_w + 2
+            y = (index // self.columns) * self.cell_h + 2
+            if image:
+                self.canvas.coords(image_item, x, y)
+                self.canvas.itemconfigure(image_item, image=image, state='normal')
+                self.canvas.itemconfigure(text_item, text='', state='hidden')
+            else:
+                # 快取中沒有圖片時降級為文字
+                self.canvas.coords(text_item, x, y)
+                self.canvas.itemconfigure(text_item, text=text, state='normal')
+                self.canvas.itemconfigure(image_item, image='', state='hidden')
+            self.images[i] = image
+            self._shown[i] = (index, image)
+
+    def __len__(self):
+        return len(self.history)
+
+    def expire_before(self, index):
+        """索引小於 index 的紀錄不再顯示（下次重繪時生效）"""
+        self.start = index
+
+    def clear(self):
+        """紀錄被清空後重設顯示"""
+        for i in range(len(self.slots)):
+            self._hide(i)
+        self.start = 0
+        self.follow = True
+        self.refresh()
+
+    def shows(self, image):
+        """圖片是否正在某個可見的項目中"""
+        return any(shown is image for shown in self.images)
+
+    def replace_image(self, old, new):
+        """把正在顯示的 old 圖片換成 new（圖片重新載入時使用）"""
+        for i, image in enumerate(self.images):
+            if image is old:
+                self.canvas.itemconfigure(self.slots[i][0], image=new)
+                self.images[i] = new
+                self._shown[i] = (self._shown[i][0], new)
+
+    def set_colors(self, bg, fg):
+        """更新文字顏色（背景由 Canvas 本身決定）"""
+        self.fg = fg
+        for _, text_item in self.slots:
+            self.canvas.itemconfigure(text_item, fill=fg)
+
+    def resize(self, columns, rows, bg, cell_size=None):
+        """每行數量或按鍵尺寸改變時重新排列（可見列數由 Canvas 高度決定，不使用 rows）"""
+        cell_size = cell_size or (self.cell_w - 4, self.cell_h - 4)
+        self.canvas.delete(self.TAG)
+        self.slots = []
+        self.images = []
+        self._shown = []
+        self._height = None
+        self._set_geometry(columns, cell_size)
+        self.refresh()
+
+
+class RenderScheduler:
+    """限制最高 FPS 的重繪排程
+
+    狀態改變時呼叫 mark_dirty()，同一畫格內的多次改變只會觸發一次
+    重繪；沒有任何改變時不會排程，閒置時不佔用 CPU。
+    """
+
+    def __init__(self, widget, fps, callback):
+        self.widget = widget
+        self.callback = callback
+        self.dirty = False
+        self._after_id = None
+        self._last_frame = 0.0
+        self.set_fps(fps)
+
+    def set_fps(self, fps):
+        """設定最高每秒重繪次數"""
+        self.interval = 1.0 / max(1, fps)
+
+    def mark_dirty(self):
+        """標記需要重繪，並在下一個畫格時間排程"""
+        self.dirty = True
+        if self._after_id is None:
+            delay = max(0.0, self._last_frame + self.interval - time.perf_counter())
+            self._after_id = self.widget.after(int(delay * 1000), self._frame)
+
+    def flush(self):
+        """立即重繪（不等待下一個畫格）"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        if self.dirty:
+            self._frame()
+
+    def _frame(self):
+        self._after_id = None
+        if not self.dirty:
+            return
+        self.dirty = False
+        self._last_frame = time.perf_counter()
+        self.callback()
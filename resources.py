@@ -16,7 +16,19 @@ DEFAULT_CONFIG = {
     "realtime_image_size": [80, 80],
     "max_keys_per_row": 10,
     "max_rows": 3,
-    "realtime_background": "default"
+    "realtime_background": "default",
+    "realtime_renderer": "label",  # label: 每個按鍵一個 Label；canvas: 單一 Canvas；history: 整個工作階段的按鍵紀錄（可捲動，不使用 max_rows）
+    "realtime_fps": 60,  # 即時按鍵最高重繪頻率
+    "thumbnail_cache_dir": "cache",  # 縮圖磁碟快取目錄
+    "thumbnail_cache_max_mb": 64,  # 縮圖磁碟快取上限（MB）
+    "sprite_cache_max_mb": 16,  # 即時按鍵圖片（PhotoImage）記憶體上限（MB）
+    "prewarm_tabs": True,  # 啟動後在閒置時預先建立其他分頁
+    "keyboard_layout": "ansi",  # layouts.json 中的鍵盤配置：ansi、iso、tkl、60
+    "key_expire_ms": 0,  # 即時按鍵按下多久後消失（毫秒），0 表示不消失
+    "key_fade_ms": 300,  # 消失前的淡出時間（毫秒）
+    "key_fade_steps": 4,  # 淡出畫格數
+    "chord_mode": False,  # 按住 CtrlLeft、ShiftLeft、AltLeft、Win 時，與其他按鍵合併成一個組合鍵圖片
+    "chord_cache_max_mb": 4  # 組合鍵合成圖片記憶體上限（MB）
 }
 
 # 內建預設按鍵映射
@@ -104,6 +116,7 @@ DEFAULT_KEY_MAP = {
     "81:True": {"key_id": "81", "name": "Num3", "png": "Num3.png"},
     "82:True": {"key_id": "82", "name": "Num0", "png": "Num0.png"},
     "83:True": {"key_id": "83", "name": ".", "png": "NumDecimal.png"},
+    "86:False": {"key_id": "86", "name": "IntlBackslash", "png": "IntlBackslash.png"},
     "87:False": {"key_id": "87", "name": "F11", "png": "F11.png"},
     "88:False": {"key_id": "88", "name": "F12", "png": "F12.png"},
     "91:False": {"key_id": "91", "name": "Win", "png": "Win.png"},
@@ -126,4 +139,102 @@ DEFAULT_KEY_MAP = {
     "82:False": {"key_id": "110", "name": "Ins", "png": "Insert.png"},
     "83:False": {"key_id": "111", "name": "Del", "png": "Delete.png"},
     "69:False": {"key_id": "119", "name": "Pause", "png": "Pause.png"}
-}
\ No newline at end of file
+}
+
+# 內建鍵盤配置（與 layouts.json 格式相同）
+DEFAULT_LAYOUTS = {
+  "default": "ansi",
+  "layouts": {
+    "ansi": {
+      "name": "ANSI 全尺寸",
+      "sections": [
+        {"name": "主鍵區", "rows": [
+          ["1", "59", "60", "61", "62", "63", "64", "65", "66", "67", "68", "87", "88"],
+          ["41", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14"],
+          ["15", "16", "17", "18", "19", "20", "21", "22", "23", "24", "25", "26", "27", "43"],
+          ["58", "30", "31", "32", "33", "34", "35", "36", "37", "38", "39", "40", {"key": "28", "w": 2}],
+          [{"key": "42", "w": 2}, "44", "45", "46", "47", "48", "49", "50", "51", "52", "53", {"key": "54", "w": 2}],
+          ["29", "91", "56", {"key": "57", "w": 7}, "100", "92", "93", "97"]
+        ]},
+        {"name": "次鍵區", "rows": [
+          ["99", "70", "119"],
+          ["110", "101", "103"],
+          ["111", "107", "109"],
+          ["", "", ""],
+          ["", "102", ""],
+          ["104", "108", "106"]
+        ]},
+        {"name": "數字鍵區", "rows": [
+          ["", "", "", ""],
+          ["69", "98", "55", "74"],
+          ["71", "72", "73", {"key": "78", "h": 2}],
+          ["75", "76", "77", ""],
+          ["79", "80", "81", {"key": "96", "h": 2}],
+          [{"key": "82", "w": 2}, "83", ""]
+        ]}
+      ]
+    },
+    "iso": {
+      "name": "ISO 全尺寸",
+      "sections": [
+        {"name": "主鍵區", "rows": [
+          ["1", "59", "60", "61", "62", "63", "64", "65", "66", "67", "68", "87", "88"],
+          ["41", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14"],
+          ["15", "16", "17", "18", "19", "20", "21", "22", "23", "24", "25", "26", "27", {"key": "28", "h": 2}],
+          ["58", "30", "31", "32", "33", "34", "35", "36", "37", "38", "39", "40", "43", ""],
+          ["42", "86", "44", "45", "46", "47", "48", "49", "50", "51", "52", "53", {"key": "54", "w": 2}],
+          ["29", "91", "56", {"key": "57", "w": 7}, "100", "92", "93", "97"]
+        ]},
+        {"name": "次鍵區", "rows": [
+          ["99", "70", "119"],
+          ["110", "101", "103"],
+          ["111", "107", "109"],
+          ["", "", ""],
+          ["", "102", ""],
+          ["104", "108", "106"]
+        ]},
+        {"name": "數字鍵區", "rows": [
+          ["", "", "", ""],
+          ["69", "98", "55", "74"],
+          ["71", "72", "73", {"key": "78", "h": 2}],
+          ["75", "76", "77", ""],
+          ["79", "80", "81", {"key": "96", "h": 2}],
+          [{"key": "82", "w": 2}, "83", ""]
+        ]}
+      ]
+    },
+    "tkl": {
+      "name": "TKL（無數字鍵區）",
+      "sections": [
+        {"name": "主鍵區", "rows": [
+          ["1", "59", "60", "61", "62", "63", "64", "65", "66", "67", "68", "87", "88"],
+          ["41", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14"],
+          ["15", "16", "17", "18", "19", "20", "21", "22", "23", "24", "25", "26", "27", "43"],
+          ["58", "30", "31", "32", "33", "34", "35", "36", "37", "38", "39", "40", {"key": "28", "w": 2}],
+          [{"key": "42", "w": 2}, "44", "45", "46", "47", "48", "49", "50", "51", "52", "53", {"key": "54", "w": 2}],
+          ["29", "91", "56", {"key": "57", "w": 7}, "100", "92", "93", "97"]
+        ]},
+        {"name": "次鍵區", "rows": [
+          ["99", "70", "119"],
+          ["110", "101", "103"],
+          ["111", "107", "109"],
+          ["", "", ""],
+          ["", "102", ""],
+          ["104", "108", "106"]
+        ]}
+      ]
+    },
+    "60": {
+      "name": "60%",
+      "sections": [
+        {"name": "主鍵區", "rows": [
+          ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14"],
+          ["15", "16", "17", "18", "19", "20", "21", "22", "23", "24", "25", "26", "27", "43"],
+          ["58", "30", "31", "32", "33", "34", "35", "36", "37", "38", "39", "40", {"key": "28", "w": 2}],
+          [{"key": "42", "w": 2}, "44", "45", "46", "47", "48", "49", "50", "51", "52", "53", {"key": "54", "w": 2}],
+          ["29", "91", "56", {"key": "57", "w": 7}, "100", "92", "93", "97"]
+        ]}
+      ]
+    }
+  }
+}
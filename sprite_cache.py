@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+即時按鍵圖片快取 - 預先縮放並包裝成 PhotoImage，按鍵時只需查表
+
+總像素位元組數超過上限時，淘汰最久沒用到的圖片；
+正在畫面上顯示的圖片（由 in_use 判斷）不會被淘汰。
+按鍵淡出用的各個畫格也放在同一個快取中，第一次需要時依預先計算的
+alpha 對照表一次產生，之後直接查表。
+組合鍵（例如 Ctrl+Shift+S）的合成圖片由 compose_sprites 產生，以組合為鍵值放在另一個快取中。
+"""
+
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+
+def sprite_bytes(sprite):
+    """PhotoImage 佔用的像素位元組數（Tk 以 RGBA 保存）"""
+    return sprite.width() * sprite.height() * 4
+
+
+def fade_tables(steps):
+    """各淡出畫格的 alpha 對照表（第 1 ~ steps 格，越後面越透明）"""
+    return [[alpha * (steps - i) // (steps + 1) for alpha in range(256)] for i in range(steps)]
+
+
+def compose_sprites(sprites, size):
+    """把多張按鍵圖片等比縮小後並排合成一張（組合鍵使用）"""
+    width, height = size
+    tile = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    cell_w = max(1, width // len(sprites))
+    for i, sprite in enumerate(sprites):
+        img = ImageTk.getimage(sprite)
+        img.thumbnail((cell_w, height), Image.Resampling.LANCZOS)
+        tile.alpha_composite(img, (i * cell_w + (cell_w - img.width) // 2, (height - img.height) // 2))
+    return ImageTk.PhotoImage(tile)
+
+
+class SpriteCache:
+    """以 (png, 尺寸, 背景) 為鍵值、有記憶體上限的 PhotoImage LRU 快取"""
+
+    def __init__(self, max_bytes=None, in_use=None, on_evict=None, fade_steps=0):
+        self.max_bytes = max_bytes  # None 表示不限制
+        self.in_use = in_use        # in_use(sprite) 為 True 時不淘汰
+        self.on_evict = on_evict    # 完整圖片被淘汰時呼叫 on_evict(png, size, background)，供釋放其他引用
+        self.fade_tables = fade_tables(fade_steps)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # {(png, size, background, 淡出畫格): ImageTk物件}，最近使用的在最後；完整圖片的畫格為 0
+        self._sprites = OrderedDict()
+
+    def get(self, png, size, background):
+        """取得已快取的圖片，沒有則回傳 None"""
+        cache_key = (png, tuple(size), background, 0)
+        sprite = self._sprites.get(cache_key)
+        if sprite is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._sprites.move_to_end(cache_key)
+        return sprite
+
+    def get_faded(self, png, size, background, step):
+        """取得第 step 個淡出畫格（1 ~ fade_steps，0 為完整圖片）；沒有完整圖片時回傳 None"""
+        if step <= 0:
+            return self.get(png, size, background)
+        cache_key = (png, tuple(size), background, step)
+        frame = self._sprites.get(cache_key)
+        if frame is not None:
+            self.hits += 1
+            self._sprites.move_to_end(cache_key)
+            return frame
+        sprite = self.get(png, size, background)
+        if sprite is None:
+            return None
+        # 一次產生所有淡出畫格：只調整 alpha 通道，透明處顯示原本的背景
+        img = ImageTk.getimage(sprite)
+        alpha = img.getchannel('A')
+        for i, table in enumerate(self.fade_tables, 1):
+            faded = img.copy()
+            faded.putalpha(alpha.point(table))
+            self._store((png, tuple(size), background, i), ImageTk.PhotoImage(faded))
+        self._evict_if_needed()
+        return self._sprites.get(cache_key)
+
+    def __contains__(self, cache_key):
+        """(png, 尺寸, 背景) 是否已快取（不影響使用順序與統計）"""
+        png, size, background = cache_key
+        return (png, tuple(size), background, 0) in self._sprites
+
+    def put(self, png, size, background, sprite):
+        """放入已包裝好的圖片（例如背景載入的結果）"""
+        self._store((png, tuple(size), background, 0), sprite)
+        self._evict_if_needed()
+
+    def _store(self, cache_key, sprite):
+        old = self._sprites.pop(cache_key, None)
+        if old is not None:
+            self.nbytes -= sprite_bytes(old)
+        self._sprites[cache_key] = sprite
+        self.nbytes += sprite_bytes(sprite)
+
+    def _evict_if_needed(self):
+        """超過上限時從最久沒用到的開始淘汰，跳過正在顯示的圖片"""
+        if self.max_bytes is None or self.nbytes <= self.max_bytes:
+            return
+        for cache_key in list(self._sprites):
+            if self.nbytes <= self.max_bytes:
+                break
+            sprite = self._sprites[cache_key]
+            if self.in_use is not None and self.in_use(sprite):
+                continue
+            self._remove(cache_key)
+            self.evictions += 1
+            if self.on_evict is not None and cache_key[3] == 0:
+                self.on_evict(*cache_key[:3])
+
+    def _remove(self, cache_key):
+        self.nbytes -= sprite_bytes(self._sprites.pop(cache_key))
+
+    def invalidate(self, png):
+        """移除某張圖片的所有尺寸、背景版本與淡出畫格，回傳被移除的完整圖片鍵值 (png, 尺寸, 背景)"""
+        removed = [k for k in self._sprites if k[0] == png]
+        for cache_key in removed:
+            self._remove(cache_key)
+        return [cache_key[:3] for cache_key in removed if cache_key[3] == 0]
+
+    def clear(self):
+        """清空快取"""
+        for cache_key in list(self._sprites):
+            self._remove(cache_key)
+
+    def stats(self):
+        """快取統計說明文字"""
+        return (f"即時按鍵圖片快取: {len(self._sprites)} 張，{self.nbytes / 1024:.0f} KB，"
+                f"命中 {self.hits}，未命中 {self.misses}，淘汰 {self.evictions}")
+
+    def __len__(self):
+        return len(self._sprites)
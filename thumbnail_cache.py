@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+縮圖磁碟快取 - 保存已縮放好的圖片，下次啟動直接讀取小檔案
+
+檔名由 (原圖內容雜湊, 目標尺寸, 縮放濾鏡) 組成，圖片內容改變時自然對應到新檔案；
+快取總大小超過上限時，刪除最久沒用到的檔案。
+"""
+
+import hashlib
+import os
+import re
+import threading
+
+from PIL import Image
+
+# 快取檔名：{內容雜湊}_{寬}x{高}_{濾鏡}.png；同一目錄中的其他檔案（例如 atlas.png）不屬於快取
+ENTRY_PATTERN = re.compile(r"[0-9a-f]{40}_\d+x\d+_[a-z]+\.png")
+
+
+class ThumbnailCache:
+    """以內容雜湊為鍵值的縮圖快取（可在多個執行緒同時使用）"""
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._digests = {}  # {(path, mtime_ns, size): 內容雜湊}，同一次執行中不重複計算
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total = sum(entry.stat().st_size for entry in self._entries())
+        self._evict_if_needed()
+
+    def digest(self, path):
+        """原圖內容的 SHA-1（依路徑、修改時間與大小記憶結果）"""
+        st = os.stat(path)
+        memo_key = (path, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._digests.get(memo_key)
+        if digest is None:
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            with self._lock:
+                self._digests[memo_key] = digest
+        return digest
+
+    def remember_digest(self, path, mtime_ns, size, digest):
+        """記下已知的內容雜湊（例如 atlas 索引中的結果），之後不必再讀取原圖"""
+        with self._lock:
+            self._digests[(path, mtime_ns, size)] = digest
+
+    def _entries(self):
+        """快取目錄中屬於縮圖快取的檔案"""
+        return [entry for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and ENTRY_PATTERN.fullmatch(entry.name)]
+
+    def entry_path(self, digest, size, resample):
+        """縮圖在快取目錄中的路徑"""
+        filter_name = Image.Resampling(resample).name.lower()
+        return os.path.join(self.cache_dir, f"{digest}_{size[0]}x{size[1]}_{filter_name}.png")
+
+    def load(self, path, size, resample, decode):
+        """取得縮圖；快取中沒有時呼叫 decode(path, size, resample) 產生並保存"""
+        size = tuple(size)
+        entry = self.entry_path(self.digest(path), size, resample)
+        try:
+            with Image.open(entry) as img:
+                img.load()
+            os.utime(entry)  # 更新使用時間，供淘汰時判斷
+            with self._lock:
+                self.hits += 1
+            return img
+        except (FileNotFoundError, OSError):
+            pass
+
+        img = decode(path, size, resample)
+        with self._lock:
+            self.misses += 1
+        self._store(entry, img)
+        return img
+
+    def _store(self, entry, img):
+        """寫入快取（先寫暫存檔再改名，避免其他執行緒讀到一半的檔案）"""
+        tmp = f"{entry}.{threading.get_ident()}.tmp"
+        try:
+            img.save(tmp, "PNG", compress_level=1)
+            os.replace(tmp, entry)
+            added = os.path.getsize(entry)
+        except Exception as e:
+            print(f"寫入縮圖快取失敗 {entry}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        with self._lock:
+            self._total += added
+        self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        """超過上限時刪除最久沒用到的檔案，直到低於上限的 90%"""
+        with self._lock:
+            if self._total <= self.max_bytes:
+                return
+            entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                             for entry in self._entries())
+            target = self.max_bytes * 0.9
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry_path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(entry_path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total = total
+
+    def clear(self):
+        """刪除所有快取檔案"""
+        with self._lock:
+            for entry in self._entries():
+                os.remove(entry.path)
+            self._total = 0
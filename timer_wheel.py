@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+雜湊時間輪 - 大量計時只用一個 root.after 推進
+
+時間切成固定長度的刻度，每個刻度對應一個桶（到期刻度 % 桶數）；
+排程只是把計時放進桶裡，推進時只處理目前刻度的桶，
+成本與等待中的計時數量無關。沒有任何計時時不排程，閒置時不佔用 CPU。
+"""
+
+import time
+
+
+class TimerWheel:
+    """以單一 after 推進的計時器（只在 Tk 執行緒使用）"""
+
+    def __init__(self, widget, tick_ms=20, size=512):
+        self.widget = widget
+        self.tick_ms = tick_ms
+        self.buckets = [[] for _ in range(size)]  # 每個桶: [(到期刻度, callback, args)]
+        self.tick = 0        # 已處理到的刻度
+        self.count = 0       # 等待中的計時數量
+        self._origin = time.monotonic()
+        self._after_id = None
+
+    def now_tick(self):
+        """目前時間所在的刻度"""
+        return int((time.monotonic() - self._origin) * 1000) // self.tick_ms
+
+    def schedule(self, delay_ms, callback, *args):
+        """delay_ms 毫秒後呼叫 callback(*args)（精確度為一個刻度）"""
+        if not self.count:
+            self.tick = self.now_tick()  # 閒置後重新開始，不補處理空的刻度
+        due = self.now_tick() + max(1, -(-int(delay_ms) // self.tick_ms))
+        self.buckets[due % len(self.buckets)].append((due, callback, args))
+        self.count += 1
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.tick_ms, self._advance)
+
+    def _advance(self):
+        """處理到目前時間為止的所有刻度（after 延遲時一次補上）"""
+        self._after_id = None
+        now = self.now_tick()
+        while self.tick < now and self.count:
+            self.tick += 1
+            index = self.tick % len(self.buckets)
+            bucket = self.buckets[index]
+            if not bucket:
+                continue
+            # 超過一圈的計時留在桶中，等之後經過時再處理
+            due_now = [timer for timer in bucket if timer[0] <= self.tick]
+            if len(due_now) < len(bucket):
+                self.buckets[index] = [timer for timer in bucket if timer[0] > self.tick]
+            else:
+                self.buckets[index] = []
+            self.count -= len(due_now)
+            for _, callback, args in due_now:
+                callback(*args)
+        if self.count and self._after_id is None:
+            self._after_id = self.widget.after(self.tick_ms, self._advance)
+
+    def clear(self):
+        """取消所有計時"""
+        for bucket in self.buckets:
+            bucket.clear()
+        self.count = 0
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def __len__(self):
+        return self.count